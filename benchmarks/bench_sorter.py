@@ -0,0 +1,106 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = '1.0.0'
+# ---------------------------------------------------------------------------
+
+# Compare the GNU and python engines of Sorter, and show how the python
+# engine scales with Sorter.parallel.
+#
+#   $ python benchmarks/bench_sorter.py --lines 1000000 --repeat 3
+#   $ python benchmarks/bench_sorter.py --lines 5000000 --parallel 1,2,4,8,16,32
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1].joinpath('src')))
+
+from pyshellutil import Sorter  # noqa: E402
+
+
+def make_input(path: Path, lines: int, seed: int = 0):
+    generator = random.Random(seed)
+    with open(path, 'w') as file:
+        for _ in range(lines):
+            file.write(f'{generator.randint(0, 10 ** 9)},'
+                       f'{generator.choice("abcdefghij")}{generator.randint(0, 999)},'
+                       f'{generator.random():.6f},'
+                       f'{generator.randint(0, 10 ** 6)}\n')
+            # end for
+        # end with
+    # end def
+
+
+def run(engine: str, before: Path, after: Path, args: argparse.Namespace,
+        parallel: int = None) -> float:
+    my_sort = Sorter(engine=engine)
+    my_sort.buffer_size = args.buffer_size
+    my_sort.parallel = parallel
+    my_sort.tempdir = str(before.parent)
+    start = time.perf_counter()
+    my_sort.sort(str(before), str(after), args.sort_key, ',')
+    return time.perf_counter() - start
+    # end def
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sort-key', default='-k4,4 -k1,3')
+    parser.add_argument('--buffer-size', default='256M')
+    parser.add_argument('--parallel', default='',
+                        help='comma separated worker counts for the scaling curve')
+    args = parser.parse_args()
+
+    # the python engine implements byte order comparison
+    os.environ['LC_ALL'] = 'C'
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        before = workdir.joinpath('before.txt')
+        make_input(before, args.lines)
+        print(f'{args.lines} lines, {before.stat().st_size / 2 ** 20:.1f} MiB, '
+              f'key {args.sort_key!r}, buffer {args.buffer_size}')
+
+        outputs = {}
+        for engine in ('gnu', 'python'):
+            after = workdir.joinpath(f'after_{engine}.txt')
+            timings = [run(engine, before, after, args) for _ in range(args.repeat)]
+            outputs[engine] = after.read_bytes()
+            print(f'{engine:>8}: best {min(timings):.3f}s '
+                  f'mean {sum(timings) / len(timings):.3f}s')
+            # end for
+
+        print('identical output' if outputs['gnu'] == outputs['python']
+              else 'OUTPUT DIFFERS')
+
+        if args.parallel:
+            print('python engine scaling')
+            base = None
+            for parallel in [int(value) for value in args.parallel.split(',')]:
+                after = workdir.joinpath(f'after_python_{parallel}.txt')
+                best = min(run('python', before, after, args, parallel)
+                           for _ in range(args.repeat))
+                base = base or best
+                same = after.read_bytes() == outputs['gnu']
+                print(f'{parallel:>8}: best {best:.3f}s speedup {base / best:.2f}x'
+                      f'{"" if same else " OUTPUT DIFFERS"}')
+                # end for
+            # end if
+    finally:
+        shutil.rmtree(workdir)
+        # end try
+    # end def
+
+
+if __name__ == '__main__':
+    main()
+    # end if
@@ -1,5 +1,10 @@
-from .shellcaller import ShellCaller, SubprocessErrorException
-from .sorter import Sorter
+from .shellcaller import (ShellCaller, SubprocessBatchErrorException,
+                          SubprocessErrorException)
+from .asyncshellcaller import AsyncShellCaller
+from .sorter import Sorter, SortStats
+from .sortkey import make_sort_key
 from .tar import Tar
 
-__all__ = ['ShellCaller', 'SubprocessErrorException', 'Sorter', 'Tar']
+__all__ = ['ShellCaller', 'SubprocessErrorException',
+           'SubprocessBatchErrorException', 'AsyncShellCaller', 'Sorter',
+           'SortStats', 'make_sort_key', 'Tar']
@@ -0,0 +1,120 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = '0.9.0'
+# ---------------------------------------------------------------------------
+
+import asyncio
+import logging
+import subprocess
+import weakref
+from typing import List, Tuple, Union
+
+from .shellcaller import ShellCaller, SubprocessBatchErrorException
+
+
+class AsyncShellCaller(ShellCaller):
+
+    def __init__(self, error_as_exception: bool = True,
+                 max_concurrency: int = None):
+        super(AsyncShellCaller, self).__init__(error_as_exception)
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError('max_concurrency should be positive')
+            # end if
+        self.__max_concurrency = max_concurrency
+        # one semaphore per event loop, asyncio primitives are loop bound
+        self.__semaphores = weakref.WeakKeyDictionary()
+        # end def
+
+    def get_max_concurrency(self):
+        return self.__max_concurrency
+        # end def
+
+    max_concurrency = property(get_max_concurrency)
+
+    async def call_and_parse(self, command: Union[str, List[str]],
+                             logger: logging.Logger = None) -> str:
+
+        results = await self.call_subprocess(command)
+        return self.parse_result(results, logger)
+        # end def
+
+    async def call_many(self, commands: List[Union[str, List[str]]],
+                        fail_fast: bool = True,
+                        logger: logging.Logger = None) -> List[str]:
+
+        tasks = [asyncio.ensure_future(self.call_and_parse(command, logger))
+                 for command in commands]
+        try:
+            outcomes = await asyncio.gather(*tasks,
+                                            return_exceptions=not fail_fast)
+        finally:
+            for task in tasks:
+                task.cancel()
+                # end for
+            # end try
+
+        errors = {index: outcome for index, outcome in enumerate(outcomes)
+                  if isinstance(outcome, Exception)}
+        if errors:
+            results = [None if index in errors else outcome
+                       for index, outcome in enumerate(outcomes)]
+            raise SubprocessBatchErrorException(errors, results)
+            # end if
+        return outcomes
+        # end def
+
+    async def call_subprocess(self, command: Union[str, List[str]]) -> Tuple:
+        semaphore = self._get_semaphore()
+        if semaphore is None:
+            return await self._run(command)
+            # end if
+
+        async with semaphore:
+            return await self._run(command)
+            # end with
+        # end def
+
+    async def _run(self, command: Union[str, List[str]]) -> Tuple:
+        if isinstance(command, str):
+            my_proc = await asyncio.create_subprocess_shell(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+        else:
+            my_proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+            # end if
+
+        try:
+            __stdout, __stderr = await my_proc.communicate()
+        except asyncio.CancelledError:
+            if my_proc.returncode is None:
+                my_proc.kill()
+                await my_proc.wait()
+                # end if
+            raise
+            # end try
+
+        return (my_proc.returncode, __stdout, __stderr)
+        # end def
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self.__max_concurrency is None:
+            return None
+            # end if
+
+        loop = asyncio.get_running_loop()
+        semaphore = self.__semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.__max_concurrency)
+            self.__semaphores[loop] = semaphore
+            # end if
+        return semaphore
+        # end def
+    # end class
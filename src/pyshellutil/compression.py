@@ -0,0 +1,97 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = '1.0.0'
+# ---------------------------------------------------------------------------
+
+import bz2
+import gzip
+import lzma
+import os
+from typing import BinaryIO
+
+try:
+    import zstandard
+except ImportError:
+    # zstd is optional, pip install pyshellutil[zstd]
+    zstandard = None
+    # end try
+
+COMPRESSIONS = ('gzip', 'bz2', 'xz', 'zstd')
+MAGICS = ((b'\x1f\x8b', 'gzip'),
+          (b'BZh', 'bz2'),
+          (b'\xfd7zXZ\x00', 'xz'),
+          (b'\x28\xb5\x2f\xfd', 'zstd'))
+# compression programs given to GNU sort and the codec doing their job in-process
+PROGRAMS = {'gzip': 'gzip', 'pigz': 'gzip', 'bzip2': 'bz2', 'pbzip2': 'bz2',
+            'lbzip2': 'bz2', 'xz': 'xz', 'pixz': 'xz', 'zstd': 'zstd',
+            'pzstd': 'zstd'}
+
+
+def detect_compression(path: str) -> str:
+
+    # the codec from the magic bytes, None for plain files
+    with open(path, 'rb') as file:
+        head = file.read(6)
+        # end with
+    for magic, compression in MAGICS:
+        if head.startswith(magic):
+            return compression
+            # end if
+        # end for
+    return None
+    # end def
+
+
+def program_compression(program: str) -> str:
+
+    name = os.path.basename(program.split()[0]) if program else ''
+    if name not in PROGRAMS:
+        raise ValueError(f'no python codec for compress program {program}')
+        # end if
+    return PROGRAMS[name]
+    # end def
+
+
+def open_input(path: str, buffering: int = -1) -> BinaryIO:
+
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, 'rb', buffering=buffering)
+    elif compression == 'gzip':
+        return gzip.open(path, 'rb')
+    elif compression == 'bz2':
+        return bz2.open(path, 'rb')
+    elif compression == 'xz':
+        return lzma.open(path, 'rb')
+        # end if
+    return _zstandard().open(path, 'rb')
+    # end def
+
+
+def open_output(path: str, compression: str = None, level: int = None,
+                buffering: int = -1) -> BinaryIO:
+
+    if compression is None:
+        return open(path, 'wb', buffering=buffering)
+    elif compression == 'gzip':
+        # the gzip command line default, 9 is several times slower
+        return gzip.open(path, 'wb', compresslevel=6 if level is None else level)
+    elif compression == 'bz2':
+        return bz2.open(path, 'wb', compresslevel=9 if level is None else level)
+    elif compression == 'xz':
+        return lzma.open(path, 'wb', preset=level)
+    elif compression == 'zstd':
+        return _zstandard().open(path, 'wb', cctx=_zstandard().ZstdCompressor(level=level or 3))
+        # end if
+    raise ValueError(f'compression should be one of {COMPRESSIONS}')
+    # end def
+
+
+def _zstandard():
+    if zstandard is None:
+        raise ImportError('zstandard is required for zstd files')
+        # end if
+    return zstandard
+    # end def
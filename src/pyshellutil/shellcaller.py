@@ -6,15 +6,31 @@
 # ---------------------------------------------------------------------------
 
 import logging
+import os
 import subprocess
 import sys
-from typing import Any, Tuple
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 
 class SubprocessErrorException(Exception):
     pass
 
 
+class SubprocessBatchErrorException(SubprocessErrorException):
+
+    def __init__(self, errors: Dict[int, Exception], results: List = None):
+        self.errors = errors
+        self.results = results
+        message = '\n'.join(f'[{index}] {error}'
+                            for index, error in sorted(errors.items()))
+        super(SubprocessBatchErrorException, self).__init__(message)
+        # end def
+    # end class
+
+
 class ShellCaller(object):
 
     def __init__(self, error_as_exception: bool = True):
@@ -23,8 +39,16 @@ class ShellCaller(object):
         self.__encoding = sys.getdefaultencoding()
         self.__backoff_encoding = 'cp932'
         self.__error_as_exception = error_as_exception
+        self.__stderr_limit = 1024 * 1024
+        self.__last_rusage = None
         # end def
 
+    def get_last_rusage(self):
+        return self.__last_rusage
+        # end def
+
+    last_rusage = property(get_last_rusage)
+
     def call_and_parse(self, command: str,
                        logger: logging.Logger = None) -> str:
 
@@ -32,6 +56,62 @@ class ShellCaller(object):
         return self.parse_result(results, logger)
         # end def
 
+    def call_many(self, commands: List[str], max_workers: int = None,
+                  fail_fast: bool = True,
+                  logger: logging.Logger = None) -> List[str]:
+
+        results = [None] * len(commands)
+        errors = {}
+        try:
+            for index, result in self.iter_many(commands, max_workers,
+                                                fail_fast, logger):
+                results[index] = result
+                # end for
+        except SubprocessBatchErrorException as e:
+            errors = e.errors
+            # end try
+
+        if errors:
+            raise SubprocessBatchErrorException(errors, results)
+            # end if
+        return results
+        # end def
+
+    def iter_many(self, commands: List[str], max_workers: int = None,
+                  fail_fast: bool = True,
+                  logger: logging.Logger = None) -> Iterator[Tuple[int, str]]:
+
+        errors = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            pending = {executor.submit(self.call_and_parse, command, logger): index
+                       for index, command in enumerate(commands)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if fail_fast:
+                            raise
+                            # end if
+                        errors[index] = e
+                        continue
+                        # end try
+                    yield (index, result)
+                    # end for
+                # end while
+        finally:
+            # commands not started yet are dropped on fail fast or close
+            executor.shutdown(wait=True, cancel_futures=True)
+            # end try
+
+        if errors:
+            raise SubprocessBatchErrorException(errors)
+            # end if
+        # end def
+
     def call_subprocess(self, command: str) -> Tuple:
         try:
             my_proc = subprocess.Popen(command,
@@ -39,7 +119,17 @@ class ShellCaller(object):
                                        stdout=subprocess.PIPE,
                                        stderr=subprocess.PIPE,
                                        shell=True)
-            __stdout, __stderr = my_proc.communicate()
+            my_proc.stdin.close()
+            # both pipes are read at once like communicate, but the child
+            # is reaped here to keep its resource usage
+            __errors = []
+            reader = threading.Thread(target=lambda: __errors.append(my_proc.stderr.read()),
+                                      daemon=True)
+            reader.start()
+            __stdout = my_proc.stdout.read()
+            reader.join()
+            __stderr = __errors[0]
+            self._wait(my_proc)
         finally:
             my_proc.stdin.close()
             my_proc.stdout.close()
@@ -47,6 +137,127 @@ class ShellCaller(object):
             # end try
 
         return (my_proc.returncode, __stdout, __stderr)
+        # end def
+
+    def stream(self, command: str, logger: logging.Logger = None,
+               binary: bool = False, chunk_size: int = None,
+               stdin: Iterable[bytes] = None) -> Iterator:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        my_proc = subprocess.Popen(command,
+                                   stdin=subprocess.DEVNULL if stdin is None else subprocess.PIPE,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   shell=True)
+        # stderr is drained concurrently so that a chatty child cannot
+        # block on a full pipe while we are waiting for stdout
+        __stderr = deque()
+        drainer = threading.Thread(target=self._drain,
+                                   args=(my_proc.stderr, __stderr),
+                                   daemon=True)
+        drainer.start()
+        # stdin is fed from another thread for the same reason
+        feed_errors = []
+        if stdin is not None:
+            feeder = threading.Thread(target=self._feed,
+                                      args=(my_proc.stdin, stdin, feed_errors),
+                                      daemon=True)
+            feeder.start()
+            # end if
+
+        finished = False
+        try:
+            if chunk_size:
+                reader = iter(lambda: my_proc.stdout.read(chunk_size), b'')
+            else:
+                reader = iter(my_proc.stdout.readline, b'')
+                # end if
+            for __chunk in reader:
+                if binary or chunk_size:
+                    yield __chunk
+                else:
+                    yield self._decode_return(__chunk)
+                    # end if
+                # end for
+            self._wait(my_proc)
+            if stdin is not None:
+                feeder.join()
+                # end if
+            finished = True
+        finally:
+            # closing stdout first makes any grandchild still writing
+            # to it die of SIGPIPE instead of holding the pipes open
+            my_proc.stdout.close()
+            if not finished and my_proc.returncode is None:
+                my_proc.kill()
+                self._wait(my_proc)
+                # end if
+            drainer.join()
+            my_proc.stderr.close()
+            # end try
+
+        if feed_errors:
+            raise feed_errors[0]
+            # end if
+        self._check_stream_error(my_proc.returncode, b''.join(__stderr), logger)
+        # end def
+
+    def _wait(self, my_proc: subprocess.Popen) -> int:
+
+        # user and system time, peak RSS and I/O of the child and the
+        # commands it waited for
+        _, status, self.__last_rusage = os.wait4(my_proc.pid, 0)
+        my_proc.returncode = os.waitstatus_to_exitcode(status)
+        return my_proc.returncode
+        # end def
+
+    def _feed(self, pipe: Any, chunks: Iterable[bytes], errors: List):
+        try:
+            for __chunk in chunks:
+                pipe.write(__chunk)
+                # end for
+        except BrokenPipeError:
+            # the child stopped reading, its exit status tells why
+            pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                pipe.close()
+            except BrokenPipeError:
+                pass
+                # end try
+            # end try
+        # end def
+
+    def _drain(self, pipe: Any, buffer: deque):
+        size = 0
+        for __chunk in iter(lambda: pipe.read1(65536), b''):
+            buffer.append(__chunk)
+            size += len(__chunk)
+            # keep only the tail of stderr to bound memory
+            while size > self.__stderr_limit and len(buffer) > 1:
+                size -= len(buffer.popleft())
+                # end while
+            # end for
+        # end def
+
+    def _check_stream_error(self, returncode: int, stderr: bytes,
+                            logger: logging.Logger):
+
+        error_string = ''
+        if returncode != 0 or len(stderr) != 0:
+            error_string = self._decode_return(stderr)
+            logger.critical(self.__newLine + error_string)
+            # end if
+
+        if self.__error_as_exception and len(error_string) > 0:
+            raise SubprocessErrorException(error_string)
+            # end if
+        # end def
 
     def parse_result(self, result: Tuple,
                      logger: logging.Logger = None) -> str:
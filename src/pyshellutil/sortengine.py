@@ -0,0 +1,454 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = '1.0.0'
+# ---------------------------------------------------------------------------
+
+import heapq
+import io
+import itertools
+import os
+import re
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Tuple
+
+from .compression import COMPRESSIONS, open_input, open_output
+from .sortkey import make_sort_key
+
+DEFAULT_BUFFER_SIZE = 256 * 1024 * 1024
+# number of runs merged at once, the same default as GNU sort --batch-size
+DEFAULT_FAN_IN = 16
+MAX_READ_BUFFER = 1024 * 1024
+# rough per line cost of a bytes object and its list slot
+LINE_OVERHEAD = 64
+WRITE_BATCH = 4096
+# below this many lines an in-memory sort is not worth sending to workers
+MIN_PARALLEL_LINES = 10000
+
+
+def parse_buffer_size(value: str) -> int:
+
+    if value is None:
+        return DEFAULT_BUFFER_SIZE
+        # end if
+
+    matched = re.match(r'(\d+)([MG])$', value)
+    if matched is None:
+        raise ValueError('buffer_size should be format as ...M or ...G')
+        # end if
+    unit = 1024 * 1024 if matched.group(2) == 'M' else 1024 * 1024 * 1024
+    return int(matched.group(1)) * unit
+    # end def
+
+
+def read_lines(file: BinaryIO) -> Iterator[bytes]:
+
+    for line in file:
+        # lines are handled without their terminator, a missing
+        # newline on the last line is added back on output like GNU sort
+        yield line[:-1] if line.endswith(b'\n') else line
+        # end for
+    # end def
+
+
+def join_lines(lines: Iterable[bytes]) -> Iterator[bytes]:
+
+    # newline terminated lines in batches, a write per line is too slow
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= WRITE_BATCH:
+            batch.append(b'')
+            yield b'\n'.join(batch)
+            batch = []
+            # end if
+        # end for
+    if batch:
+        batch.append(b'')
+        yield b'\n'.join(batch)
+        # end if
+    # end def
+
+
+def write_lines(file: BinaryIO, lines: Iterable[bytes]) -> int:
+
+    written = 0
+    for chunk in join_lines(lines):
+        written += file.write(chunk)
+        # end for
+    return written
+    # end def
+
+
+class RunFormat(object):
+
+    # how one sort mode keys, collapses and stores its records:
+    # plain lines, lines deduplicated on the key, or (count, line) pairs
+
+    def __init__(self, key_options: dict = None, unique: bool = False,
+                 count: bool = False):
+        super(RunFormat, self).__init__()
+
+        key_options = dict(key_options or {})
+        if unique:
+            # equal keys are duplicates, the whole line no longer decides
+            key_options['last_resort'] = False
+            # end if
+        self.line_key = make_sort_key(**key_options)
+        self.unique = unique
+        self.count = count
+        if not count:
+            self.key = self.line_key
+        elif self.line_key is None:
+            self.key = itemgetter(1)
+        else:
+            line_key = self.line_key
+            self.key = lambda pair: line_key(pair[1])
+            # end if
+        # end def
+
+    def collapse_lines(self, lines: Iterable[bytes]) -> Iterator:
+        if self.count:
+            return self.collapse((1, line) for line in lines)
+            # end if
+        return self.collapse(lines)
+        # end def
+
+    def collapse(self, records: Iterable) -> Iterator:
+        if self.count:
+            return ((sum(pair[0] for pair in group), line)
+                    for line, group in groupby(records, key=itemgetter(1)))
+        elif self.unique:
+            # the first line of each key wins, as with sort -u
+            return (next(group) for _, group in groupby(records, key=self.key))
+            # end if
+        return iter(records)
+        # end def
+
+    def encode(self, records: Iterable) -> Iterator[bytes]:
+        if self.count:
+            return (b'%d\t%s' % pair for pair in records)
+            # end if
+        return iter(records)
+        # end def
+
+    def decode(self, lines: Iterable[bytes]) -> Iterator:
+        if self.count:
+            return ((int(count), line) for count, _, line
+                    in (record.partition(b'\t') for record in lines))
+            # end if
+        return iter(lines)
+        # end def
+    # end class
+
+
+def merge_files(runs: List[str], run_format: RunFormat,
+                read_buffer: int = MAX_READ_BUFFER) -> Iterator:
+
+    # compressed inputs and runs are read transparently
+    files = [open_input(run, read_buffer) for run in runs]
+    try:
+        yield from run_format.collapse(
+            heapq.merge(*[run_format.decode(read_lines(file)) for file in files],
+                        key=run_format.key))
+    finally:
+        for file in files:
+            file.close()
+            # end for
+        # end try
+    # end def
+
+
+# workers only receive picklable options and compile the key themselves
+
+def _sort_chunk(chunk: List[bytes], format_options: tuple) -> List[bytes]:
+
+    chunk.sort(key=RunFormat(*format_options).line_key)
+    return chunk
+    # end def
+
+
+def _write_run(chunk: List[bytes], path: str, format_options: tuple,
+               compression: str = None) -> str:
+
+    run_format = RunFormat(*format_options)
+    chunk.sort(key=run_format.line_key)
+    with _open_run(path, compression) as file:
+        write_lines(file, run_format.encode(run_format.collapse_lines(chunk)))
+        # end with
+    return path
+    # end def
+
+
+def _merge_run(runs: List[str], path: str, format_options: tuple,
+               read_buffer: int, keep: frozenset = frozenset(),
+               compression: str = None) -> str:
+
+    run_format = RunFormat(*format_options)
+    with _open_run(path, compression) as file:
+        write_lines(file, run_format.encode(merge_files(runs, run_format,
+                                                        read_buffer)))
+        # end with
+    for run in runs:
+        if run not in keep:
+            os.remove(run)
+            # end if
+        # end for
+    return path
+    # end def
+
+
+def _open_run(path: str, compression: str) -> BinaryIO:
+
+    # runs are read back once, the fastest level saves most of the I/O
+    return open_output(path, compression, 1 if compression else None,
+                       MAX_READ_BUFFER)
+    # end def
+
+
+class _SerialExecutor(object):
+
+    def submit(self, function: Callable, *args: Any) -> Future:
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+            # end try
+        return future
+        # end def
+
+    def map(self, function: Callable, *iterables: Iterable) -> Iterator:
+        return map(function, *iterables)
+        # end def
+
+    def __enter__(self) -> '_SerialExecutor':
+        return self
+        # end def
+
+    def __exit__(self, *args: Any):
+        pass
+        # end def
+    # end class
+
+
+class SortEngine(object):
+
+    def __init__(self, key_options: dict = None, buffer_size: int = None,
+                 tempdir: str = None, fan_in: int = None,
+                 parallel: int = None, unique: bool = False,
+                 count: bool = False, compression: str = None):
+        super(SortEngine, self).__init__()
+
+        self.__format_options = (dict(key_options or {}), unique, count)
+        self.__format = RunFormat(*self.__format_options)
+        self.__key = self.__format.line_key
+        self.__buffer_size = buffer_size or DEFAULT_BUFFER_SIZE
+        self.__tempdir = tempdir
+        self.__fan_in = DEFAULT_FAN_IN if fan_in is None else fan_in
+        if self.__fan_in < 2:
+            raise ValueError('fan_in should be 2 or more')
+            # end if
+        self.__parallel = 1 if parallel is None else parallel
+        if self.__parallel < 1:
+            raise ValueError('parallel should be positive')
+            # end if
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f'compression should be one of {COMPRESSIONS}')
+            # end if
+        self.__compression = compression
+        self.__runs_spilled = 0
+        self.__merge_passes = 0
+        # read buffers of all merged runs share the sort buffer
+        self.__read_buffer = max(io.DEFAULT_BUFFER_SIZE,
+                                 min(MAX_READ_BUFFER,
+                                     self.__buffer_size // (self.__fan_in + 1)))
+        # end def
+
+    def get_key(self):
+        return self.__key
+        # end def
+
+    key = property(get_key)
+
+    def get_runs_spilled(self):
+        return self.__runs_spilled
+        # end def
+
+    runs_spilled = property(get_runs_spilled)
+
+    def get_merge_passes(self):
+        # intermediate passes and the final streaming merge
+        return self.__merge_passes
+        # end def
+
+    merge_passes = property(get_merge_passes)
+
+    def sort(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+
+        # every worker gets its share of the buffer once the input is
+        # known not to fit in memory
+        chunks = self._chunks(lines, self.__buffer_size,
+                              self.__buffer_size // self.__parallel)
+        chunk, more = next(chunks)
+        if not more:
+            yield from self.__format.collapse_lines(self._sort_in_memory(chunk))
+            return
+            # end if
+
+        workdir = tempfile.mkdtemp(prefix='pysort', dir=self.__tempdir)
+        names = itertools.count()
+        try:
+            with self._executor() as executor:
+                runs = self._spill_runs(chunk, chunks, workdir, names, executor)
+                self.__runs_spilled += len(runs)
+                runs = self._merge_passes(runs, workdir, names, executor)
+                # end with
+            self.__merge_passes += 1
+            yield from merge_files(runs, self.__format, self.__read_buffer)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            # end try
+        # end def
+
+    def merge(self, paths: List[str]) -> Iterator[bytes]:
+
+        if self.__format.count:
+            raise ValueError('sorted inputs cannot be merged in count mode')
+        elif len(paths) <= self.__fan_in:
+            self.__merge_passes += 1
+            yield from merge_files(paths, self.__format, self.__read_buffer)
+            return
+            # end if
+
+        workdir = tempfile.mkdtemp(prefix='pysort', dir=self.__tempdir)
+        names = itertools.count()
+        try:
+            with self._executor() as executor:
+                # the caller's files are read but never removed
+                runs = self._merge_passes(paths, workdir, names, executor,
+                                          frozenset(paths))
+                # end with
+            self.__merge_passes += 1
+            yield from merge_files(runs, self.__format, self.__read_buffer)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            # end try
+        # end def
+
+    def _executor(self) -> Any:
+        if self.__parallel > 1:
+            return ProcessPoolExecutor(max_workers=self.__parallel)
+            # end if
+        return _SerialExecutor()
+        # end def
+
+    def _split(self, chunk: List[bytes]) -> List[List[bytes]]:
+        step = -(-len(chunk) // self.__parallel)
+        return [chunk[start:start + step] for start in range(0, len(chunk), step)]
+        # end def
+
+    def _sort_in_memory(self, chunk: List[bytes]) -> Iterator[bytes]:
+
+        if self.__parallel == 1 or len(chunk) < MIN_PARALLEL_LINES:
+            chunk.sort(key=self.__key)
+            return iter(chunk)
+            # end if
+
+        with self._executor() as executor:
+            pieces = list(executor.map(_sort_chunk, self._split(chunk),
+                                       itertools.repeat(self.__format_options)))
+            # end with
+        chunk.clear()
+        # pieces are in input order so equal keys stay stable
+        return heapq.merge(*pieces, key=self.__key)
+        # end def
+
+    def _chunks(self, lines: Iterable[bytes], first_limit: int,
+                limit: int) -> Iterator[Tuple[List[bytes], bool]]:
+
+        chunk = []
+        size = 0
+        for line in lines:
+            if size >= first_limit:
+                # a chunk is only handed out once more input is known to follow
+                yield (chunk, True)
+                chunk = []
+                size = 0
+                first_limit = limit
+                # end if
+            chunk.append(line)
+            size += len(line) + LINE_OVERHEAD
+            # end for
+        yield (chunk, False)
+        # end def
+
+    def _spill_runs(self, first: List[bytes],
+                    chunks: Iterator[Tuple[List[bytes], bool]],
+                    workdir: str, names: Iterator[int],
+                    executor: Any) -> List[str]:
+
+        runs = []
+        in_flight = deque()
+
+        def submit(chunk: List[bytes]):
+            # bound the chunks held by workers so memory stays predictable
+            while len(in_flight) >= self.__parallel:
+                in_flight.popleft().result()
+                # end while
+            path = os.path.join(workdir, f'run{next(names):06d}')
+            in_flight.append(executor.submit(_write_run, chunk, path,
+                                             self.__format_options,
+                                             self.__compression))
+            runs.append(path)
+            # end def
+
+        for piece in self._split(first):
+            submit(piece)
+            # end for
+        first.clear()
+        for chunk, _ in chunks:
+            submit(chunk)
+            # end for
+        for future in in_flight:
+            future.result()
+            # end for
+
+        return runs
+        # end def
+
+    def _merge_passes(self, runs: List[str], workdir: str,
+                      names: Iterator[int], executor: Any,
+                      keep: frozenset = frozenset()) -> List[str]:
+
+        # intermediate passes keep at most fan_in runs open at a time and
+        # merge the groups of one pass concurrently; groups are merged in
+        # order so equal lines keep their input order
+        while len(runs) > self.__fan_in:
+            futures = []
+            for start in range(0, len(runs), self.__fan_in):
+                group = runs[start:start + self.__fan_in]
+                if len(group) == 1:
+                    futures.append(group[0])
+                    continue
+                    # end if
+                path = os.path.join(workdir, f'run{next(names):06d}')
+                futures.append(executor.submit(_merge_run, group, path,
+                                               self.__format_options,
+                                               self.__read_buffer, keep,
+                                               self.__compression))
+                # end for
+            runs = [future if isinstance(future, str) else future.result()
+                    for future in futures]
+            self.__merge_passes += 1
+            # end while
+
+        return runs
+        # end def
+    # end class
@@ -5,18 +5,77 @@
 # __version__ = '1.0.0'
 # ---------------------------------------------------------------------------
 
+import bisect
+import glob
+import heapq
+import itertools
 import logging
+import os
+import random
 import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Tuple, Union
 
 from . import ShellCaller
+from .compression import (COMPRESSIONS, detect_compression, open_input,
+                          open_output, program_compression)
+from .sortengine import (MAX_READ_BUFFER, WRITE_BATCH, SortEngine, join_lines,
+                         parse_buffer_size, read_lines, write_lines)
+from .sortkey import make_sort_key
+from .sorttuning import (AUTO, COMPRESSION_RATIO, IN_MEMORY_FACTOR, MEBIBYTE,
+                         available_cpus, available_memory, free_space,
+                         tune_batch_size, tune_buffer_size, tune_parallel)
 
+ENGINES = ('gnu', 'python')
+# lines sampled for the partition boundaries
+DEFAULT_SAMPLE_SIZE = 10000
+# sort -c reports the first disorder as sort: FILE:LINE: disorder: TEXT
+DISORDER = re.compile(rb':(\d+): disorder: ')
 
-class Sorter(object):
+
+class SortStats(object):
 
     def __init__(self):
+        super(SortStats, self).__init__()
+
+        self.wall_time = 0.0
+        # user and system seconds of this process and its children
+        self.cpu_time = 0.0
+        # peak RSS in KiB of the sort child, or of this process and its
+        # workers with the python engine
+        self.max_rss = None
+        # uncompressed bytes of the input and output lines
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # known for the python engine only
+        self.runs_spilled = None
+        self.merge_passes = None
+        # end def
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+        # end def
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={value!r}' for name, value in vars(self).items())
+        return f'SortStats({fields})'
+        # end def
+    # end class
+
+
+class Sorter(object):
+
+    def __init__(self, engine: str = 'gnu'):
         super(Sorter, self).__init__()
 
         # properties
+        self.__engine = None
+        self.engine = engine
         self.__delimiter = None
         self.__ignore_leading_blanks = False
         self.__ignore_case = False
@@ -27,8 +86,30 @@ class Sorter(object):
         self.__input_file = None
         self.__sort_key_option = None
         self.__parallel = None
+        self.__batch_size = None
+        self.__unique = False
+        self.__compress_program = None
+        self.__output_compression = None
+        self.__stats_hook = None
+        self.__last_stats = None
+        self.__stats = SortStats()
+        self.__engines = []
+        self.__encoding = sys.getdefaultencoding()
+        # end def
+
+    def get_engine(self):
+        return self.__engine
+        # end def
+
+    def set_engine(self, value: str):
+        if value in ENGINES:
+            self.__engine = value
+        else:
+            raise ValueError(f'engine should be one of {ENGINES}')
         # end def
 
+    engine = property(get_engine, set_engine)
+
     def get_delimiter(self):
         return self.__delimiter
         # end def
@@ -81,12 +162,11 @@ class Sorter(object):
         # end def
 
     def set_buffer_size(self, value: str):
-        pattern = r'\d*[MG]'
-        matched = re.match(pattern, value)
-        if matched is not None:
+        pattern = r'\d+[MG]'
+        if value == AUTO or re.fullmatch(pattern, value) is not None:
             self.__buffer_size = value
         else:
-            raise ValueError('buffer_size should be format as ...M or ...G')
+            raise ValueError('buffer_size should be format as ...M or ...G, or auto')
         # end def
 
     buffer_size = property(get_buffer_size, set_buffer_size)
@@ -115,7 +195,7 @@ class Sorter(object):
         return self.__input_file
         # end def
 
-    def set_input_file(self, value: str):
+    def set_input_file(self, value: Union[str, List[str]]):
         self.__input_file = value
         # end def
 
@@ -135,13 +215,90 @@ class Sorter(object):
         return self.__parallel
         # end def
 
-    def set_parallel(self, value: int):
-        self.__parallel = value
+    def set_parallel(self, value: Union[int, str]):
+        if value is None or value == AUTO or (isinstance(value, int) and value >= 1):
+            self.__parallel = value
+        else:
+            raise ValueError('parallel should be positive or auto')
         # end def
 
     parallel = property(get_parallel, set_parallel)
 
-    def sort(self, input: str = None, output: str = None,
+    def get_batch_size(self):
+        return self.__batch_size
+        # end def
+
+    def set_batch_size(self, value: int):
+        if value is None or value >= 2:
+            self.__batch_size = value
+        else:
+            raise ValueError('batch_size should be 2 or more')
+        # end def
+
+    batch_size = property(get_batch_size, set_batch_size)
+
+    def get_unique(self):
+        return self.__unique
+        # end def
+
+    def set_unique(self, value: bool):
+        self.__unique = value
+        # end def
+
+    unique = property(get_unique, set_unique)
+
+    def get_compress_program(self):
+        return self.__compress_program
+        # end def
+
+    def set_compress_program(self, value: str):
+        self.__compress_program = value
+        # end def
+
+    compress_program = property(get_compress_program, set_compress_program)
+
+    def get_output_compression(self):
+        return self.__output_compression
+        # end def
+
+    def set_output_compression(self, value: str):
+        if value is None or value in COMPRESSIONS:
+            self.__output_compression = value
+        else:
+            raise ValueError(f'output_compression should be one of {COMPRESSIONS}')
+        # end def
+
+    output_compression = property(get_output_compression, set_output_compression)
+
+    def get_stats_hook(self):
+        return self.__stats_hook
+        # end def
+
+    def set_stats_hook(self, value: Callable[[SortStats], Any]):
+        if value is None or callable(value):
+            self.__stats_hook = value
+        else:
+            raise ValueError('stats_hook should be callable')
+        # end def
+
+    stats_hook = property(get_stats_hook, set_stats_hook)
+
+    def get_last_stats(self):
+        return self.__last_stats
+        # end def
+
+    last_stats = property(get_last_stats)
+
+    def __getstate__(self) -> dict:
+        # the hook and the measured engines stay in this process, workers
+        # only check inputs
+        state = self.__dict__.copy()
+        state['_Sorter__stats_hook'] = None
+        state['_Sorter__engines'] = []
+        return state
+        # end def
+
+    def sort(self, input: Union[str, List[str]] = None, output: str = None,
              sort_key: str = None, delimiter: str = None, logger: logging.Logger = None) -> str:
 
         if logger is None:
@@ -157,31 +314,821 @@ class Sorter(object):
         if delimiter:
             self.delimiter = delimiter
 
-        command = 'sort '
+        return self._measured(self._sort, logger)
+        # end def
+
+    def _sort(self, logger: logging.Logger) -> str:
+
+        if self.engine == 'python':
+            return self._sort_python(logger)
+        elif self._streamed():
+            # compressed files and file objects go through sort's stdin and stdout
+            return self._write_output(self._sort_lines(self._read_inputs(), logger))
+            # end if
+
+        command = 'sort ' + self._gnu_options()
+        if self.output_file:
+            command += f'-o\'{self.output_file}\' '
+        command, files0 = self._gnu_inputs(command)
+
+        logger.info(command)
+
+        try:
+            my_shell = ShellCaller(error_as_exception=True)
+            result = my_shell.call_and_parse(command, logger)
+        finally:
+            if files0:
+                os.remove(files0)
+                # end if
+            # end try
+        self._record_files(self._input_files(), result)
+        self._record_child(my_shell)
+        return result
+        # end def
+
+    def count_unique(self, input: Union[str, List[str]] = None, output: str = None,
+                     sort_key: str = None, delimiter: str = None,
+                     logger: logging.Logger = None) -> str:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        if input:
+            self.input_file = input
+        if output:
+            self.output_file = output
+        if sort_key:
+            self.sort_key_option = sort_key
+        if delimiter:
+            self.delimiter = delimiter
+
+        return self._measured(self._count_unique, logger)
+        # end def
+
+    def _count_unique(self, logger: logging.Logger) -> str:
+
+        # identical lines are counted like sort | uniq -c, whatever unique says
+        if self.engine == 'python':
+            engine = self._python_engine(unique=False, count=True)
+            logger.info(f'python count unique {self.input_file} -> {self.output_file}')
+            return self._write_output(b'%7d %s' % pair
+                                      for pair in engine.sort(self._read_inputs()))
+            # end if
+
+        if hasattr(self.input_file, 'read') or self._compressed_inputs():
+            lines = self._sort_lines(self._read_inputs(), logger, unique=False)
+            return self._write_output(b'%7d %s' % (sum(1 for _ in group), line)
+                                      for line, group in itertools.groupby(lines))
+            # end if
+
+        command, files0 = self._gnu_inputs('sort ' + self._gnu_options(unique=False))
+        logger.info(command)
+
+        try:
+            my_shell = ShellCaller(error_as_exception=True)
+            # equal lines come out of sort next to each other
+            lines = (line[:-1] if line.endswith(b'\n') else line
+                     for line in my_shell.stream(command, logger, binary=True))
+            result = self._write_output(b'%7d %s' % (sum(1 for _ in group), line)
+                                        for line, group in itertools.groupby(lines))
+        finally:
+            if files0:
+                os.remove(files0)
+                # end if
+            # end try
+        self._record_files(self._input_files())
+        self._record_child(my_shell)
+        return result
+        # end def
+
+    def top_k(self, k: int, input: Union[str, List[str]] = None, output: str = None,
+              sort_key: str = None, delimiter: str = None, largest: bool = False,
+              logger: logging.Logger = None) -> str:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        if input:
+            self.input_file = input
+        if output:
+            self.output_file = output
+        if sort_key:
+            self.sort_key_option = sort_key
+        if delimiter:
+            self.delimiter = delimiter
+
+        if k < 0:
+            raise ValueError('k should be 0 or more')
+        elif self.unique:
+            raise ValueError('top_k does not support unique')
+            # end if
+
+        return self._measured(self._top_k, k, largest, logger)
+        # end def
+
+    def _top_k(self, k: int, largest: bool, logger: logging.Logger) -> str:
+
+        # one pass through a heap of k lines with either engine, the key
+        # compares bytes like the python engine does
+        key = make_sort_key(**self._key_options())
+        logger.info(f'top {k} {self.input_file} -> {self.output_file}')
+        if largest:
+            lines = heapq.nlargest(k, self._read_inputs(), key=key)
+        else:
+            lines = heapq.nsmallest(k, self._read_inputs(), key=key)
+            # end if
+
+        return self._write_output(iter(lines))
+        # end def
+
+    def partition_sort(self, input: Union[str, List[str]] = None,
+                       outputs: Union[int, List[str]] = 2, output: str = None,
+                       sort_key: str = None, delimiter: str = None,
+                       sample_size: int = DEFAULT_SAMPLE_SIZE,
+                       logger: logging.Logger = None) -> List[str]:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        if input:
+            self.input_file = input
+        if output:
+            self.output_file = output
+        if sort_key:
+            self.sort_key_option = sort_key
+        if delimiter:
+            self.delimiter = delimiter
+
+        if isinstance(outputs, int):
+            if outputs < 1:
+                raise ValueError('outputs should be positive')
+            elif not isinstance(self.output_file, (str, os.PathLike)):
+                raise ValueError('partition_sort needs an output path to number the partitions')
+                # end if
+            outputs = [f'{self.output_file}.{index:05d}' for index in range(outputs)]
+            # end if
+        if hasattr(self.input_file, 'read') or not self._input_files():
+            raise ValueError('partition_sort needs input files, they are read twice')
+            # end if
+
+        return self._measured(self._partition_sort, [str(output) for output in outputs],
+                              sample_size, logger)
+        # end def
+
+    def _partition_sort(self, outputs: List[str], sample_size: int,
+                        logger: logging.Logger) -> List[str]:
+
+        # boundaries are compared in byte order, so the GNU engine sorts
+        # the partitions with LC_ALL=C to keep their ranges apart
+        key = make_sort_key(**dict(self._key_options(), last_resort=not self.unique))
+        inputs = self._input_files()
+        samples = sorted(self._sample_lines(inputs, sample_size), key=key)
+        boundaries = [samples[len(samples) * index // len(outputs)]
+                      for index in range(1, len(outputs))] if samples else []
+        boundaries = [boundary if key is None else key(boundary) for boundary in boundaries]
+        logger.info(f'partition {inputs} into {len(outputs)} at {len(boundaries)} boundaries')
+
+        workdir = tempfile.mkdtemp(prefix='pypart', dir=self.tempdir)
+        try:
+            buckets = [os.path.join(workdir, f'bucket{index:05d}') for index in range(len(outputs))]
+            self._write_buckets(self._read_files(inputs), buckets, boundaries, key)
+
+            workers, settings = self._partition_settings(len(outputs))
+            # sort runs outside the GIL, the python engine needs processes
+            if self.engine == 'python':
+                executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers)
+                # end if
+            with executor:
+                for _ in executor.map(self._sort_bucket, buckets, outputs,
+                                      itertools.repeat(settings)):
+                    pass
+                    # end for
+                # end with
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+            # end try
+
+        self.__stats.bytes_written += sum(os.path.getsize(output) for output in outputs)
+        return outputs
+        # end def
+
+    def _partition_settings(self, partitions: int) -> Tuple[int, Tuple[str, int, int]]:
+
+        # the cores and the memory are shared by the partitions sorted at once
+        cpus = self.parallel if isinstance(self.parallel, int) else available_cpus()
+        workers = max(1, min(partitions, cpus))
+        parallel = cpus // workers if cpus // workers > 1 else None
+        buffer_size = self.buffer_size
+        if buffer_size == AUTO:
+            input_size = self._input_size()
+            size = tune_buffer_size(None if input_size is None else input_size // partitions,
+                                    available_memory() // workers)
+            buffer_size = f'{max(1, size // MEBIBYTE)}M'
+            # end if
+        return (workers, (buffer_size, parallel, self.batch_size))
+        # end def
+
+    def _sample_lines(self, inputs: List[str], sample_size: int) -> List[bytes]:
+
+        # a fixed seed gives the same partitions for the same input
+        generator = random.Random(0)
+        sizes = [os.path.getsize(input) for input in inputs]
+        samples = []
+        for input, size in zip(inputs, sizes):
+            count = -(-sample_size * size // max(1, sum(sizes)))
+            if detect_compression(input):
+                # no cheap seeks in a compressed stream, sample while reading
+                with open_input(input) as file:
+                    reservoir = []
+                    for index, line in enumerate(read_lines(file)):
+                        if index < count:
+                            reservoir.append(line)
+                        elif generator.randrange(index + 1) < count:
+                            reservoir[generator.randrange(count)] = line
+                            # end if
+                        # end for
+                    # end with
+                samples.extend(reservoir)
+                continue
+                # end if
+            with open(input, 'rb') as file:
+                for offset in sorted(generator.randrange(size) for _ in range(count if size else 0)):
+                    # the line after a random offset, skipping the partial one
+                    file.seek(offset)
+                    if offset > 0:
+                        file.readline()
+                        # end if
+                    line = file.readline()
+                    if line:
+                        samples.append(line[:-1] if line.endswith(b'\n') else line)
+                        # end if
+                    # end for
+                # end with
+            # end for
+        return samples
+        # end def
+
+    def _write_buckets(self, lines: Iterable[bytes], buckets: List[str],
+                       boundaries: List[Any], key: Callable):
+
+        files = [open(bucket, 'wb') for bucket in buckets]
+        try:
+            pending = [[] for _ in buckets]
+            for line in lines:
+                index = bisect.bisect_right(boundaries, line if key is None else key(line))
+                pending[index].append(line)
+                if len(pending[index]) >= WRITE_BATCH:
+                    write_lines(files[index], pending[index])
+                    pending[index] = []
+                    # end if
+                # end for
+            for file, bucket in zip(files, pending):
+                write_lines(file, bucket)
+                # end for
+        finally:
+            for file in files:
+                file.close()
+                # end for
+            # end try
+        # end def
+
+    def _sort_bucket(self, bucket: str, output: str, settings: Tuple[str, int, int]):
+
+        buffer_size, _, batch_size = settings
+        if self.engine == 'python':
+            engine = SortEngine(self._key_options(), parse_buffer_size(buffer_size),
+                                self.tempdir, batch_size, None, self.unique, False,
+                                program_compression(self.compress_program)
+                                if self.compress_program else None)
+            with open(bucket, 'rb') as file:
+                with open_output(output, self.output_compression) as writer:
+                    write_lines(writer, engine.sort(read_lines(file)))
+                    # end with
+                # end with
+            return
+            # end if
+
+        command = 'LC_ALL=C sort ' + self._gnu_options(settings=settings)
+        if self.output_compression:
+            command += f'\'{bucket}\''
+            my_shell = ShellCaller(error_as_exception=True)
+            with open_output(output, self.output_compression) as writer:
+                for chunk in my_shell.stream(command, binary=True, chunk_size=MAX_READ_BUFFER):
+                    writer.write(chunk)
+                    # end for
+                # end with
+            return
+            # end if
+        command += f'-o\'{output}\' \'{bucket}\''
+        ShellCaller(error_as_exception=True).call_and_parse(command)
+        # end def
+
+    def check(self, input: str = None, sort_key: str = None,
+              delimiter: str = None, logger: logging.Logger = None) -> int:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        if input:
+            self.input_file = input
+        if sort_key:
+            self.sort_key_option = sort_key
+        if delimiter:
+            self.delimiter = delimiter
+
+        if hasattr(self.input_file, 'read'):
+            return self._check_input(self.input_file, logger)
+            # end if
+        inputs = self._input_files()
+        if len(inputs) > 1:
+            raise ValueError('check takes a single input, use check_many')
+            # end if
+        return self._check_input(inputs[0] if inputs else None, logger)
+        # end def
+
+    def check_many(self, inputs: Union[str, List[str]], max_workers: int = None,
+                   sort_key: str = None, delimiter: str = None,
+                   logger: logging.Logger = None) -> List[int]:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        self.input_file = inputs
+        if sort_key:
+            self.sort_key_option = sort_key
+        if delimiter:
+            self.delimiter = delimiter
+
+        paths = self._input_files()
+        # sort -c runs outside the GIL, the python check needs processes
+        if self.engine == 'python':
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            # end if
+        with executor:
+            return list(executor.map(self._check_input, paths,
+                                     itertools.repeat(logger)))
+            # end with
+        # end def
+
+    def _check_input(self, input: Union[str, BinaryIO], logger: logging.Logger) -> int:
+
+        # the one based number of the first line out of order, None if sorted
+        if isinstance(input, (str, os.PathLike)) and detect_compression(input):
+            with open_input(input) as file:
+                return self._check_input(file, logger)
+                # end with
+        elif self.engine == 'python':
+            logger.info(f'python check {input}')
+            if hasattr(input, 'read'):
+                return self._check_lines(read_lines(input))
+                # end if
+            with open(sys.stdin.fileno() if input is None else input, 'rb',
+                      closefd=input is not None) as file:
+                return self._check_lines(read_lines(file))
+                # end with
+            # end if
+
+        command = 'sort -c ' + self._gnu_options()
+        if hasattr(input, 'read'):
+            # the report is read from stdout since stderr would be logged
+            # as a failure, sort -c stops at the first disorder
+            command += '2>&1 || true'
+            logger.info(command)
+            my_shell = ShellCaller(error_as_exception=True)
+            result = b''.join(my_shell.stream(command, logger, binary=True,
+                                              stdin=join_lines(read_lines(input))))
+            result = (1 if result else 0, b'', result)
+        else:
+            if input is not None:
+                command += f'\'{input}\''
+                # end if
+            logger.info(command)
+            my_shell = ShellCaller(error_as_exception=True)
+            result = my_shell.call_subprocess(command)
+            # end if
+
+        matched = DISORDER.search(result[2])
+        if result[0] == 1 and matched is not None:
+            return int(matched.group(1))
+            # end if
+        my_shell.parse_result(result, logger)
+        return None
+        # end def
+
+    def _check_lines(self, lines: Iterable[bytes]) -> int:
+
+        # with unique equal keys are a disorder too, like sort -c -u
+        key = make_sort_key(**dict(self._key_options(), last_resort=not self.unique))
+        previous = None
+        for number, line in enumerate(lines, 1):
+            value = line if key is None else key(line)
+            if number > 1 and (value < previous or (self.unique and not previous < value)):
+                return number
+                # end if
+            previous = value
+            # end for
+        return None
+        # end def
+
+    def _gnu_inputs(self, command: str) -> Tuple[str, str]:
+
+        inputs = self._input_files()
+        files0 = None
+        if len(inputs) == 1:
+            command += f'\'{inputs[0]}\''
+        elif len(inputs) > 1:
+            # a NUL separated list keeps the command line short however
+            # many files are sorted together
+            fd, files0 = tempfile.mkstemp(prefix='files0', dir=self.tempdir)
+            with os.fdopen(fd, 'wb') as file:
+                file.write(b''.join(os.fsencode(input) + b'\0' for input in inputs))
+                # end with
+            command += f'--files0-from=\'{files0}\''
+            # end if
+
+        return (command, files0)
+        # end def
+
+    def sort_iter(self, iterable: Iterable[Union[str, bytes]],
+                  logger: logging.Logger = None) -> Iterator[Union[str, bytes]]:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        iterator = iter(iterable)
+        first = next(iterator, None)
+        if first is None:
+            return
+            # end if
+
+        # records come back without their newline, as str if they were given as str
+        text = isinstance(first, str)
+        lines = (self._to_line(record) for record in itertools.chain([first], iterator))
+        for line in self._sort_lines(lines, logger):
+            yield line.decode(self.__encoding) if text else line
+            # end for
+        # end def
+
+    def _to_line(self, record: Union[str, bytes]) -> bytes:
+        if isinstance(record, str):
+            record = record.encode(self.__encoding)
+            # end if
+        return record[:-1] if record.endswith(b'\n') else record
+        # end def
+
+    def _sort_lines(self, lines: Iterable[bytes], logger: logging.Logger,
+                    unique: bool = None) -> Iterator[bytes]:
+
+        if self.engine == 'python':
+            yield from self._python_engine(unique).sort(lines)
+            return
+            # end if
+
+        command = 'sort ' + self._gnu_options(unique)
+        logger.info(command)
+
+        my_shell = ShellCaller(error_as_exception=True)
+        for line in my_shell.stream(command, logger, binary=True,
+                                    stdin=join_lines(lines)):
+            yield line[:-1] if line.endswith(b'\n') else line
+            # end for
+        self._record_child(my_shell)
+        # end def
+
+    def merge(self, inputs: List[str], output: str = None,
+              sort_key: str = None, delimiter: str = None,
+              logger: logging.Logger = None) -> str:
+
+        if logger is None:
+            logger = logging.getLogger(__name__)
+            # end if
+
+        if output:
+            self.output_file = output
+        if sort_key:
+            self.sort_key_option = sort_key
+        if delimiter:
+            self.delimiter = delimiter
+
+        return self._measured(self._merge, [str(input) for input in inputs], logger)
+        # end def
+
+    def _merge(self, inputs: List[str], logger: logging.Logger) -> str:
+
+        if self.engine == 'python':
+            return self._merge_python(inputs, logger)
+        elif any(detect_compression(input) for input in inputs if os.path.isfile(input)):
+            # sort -m cannot read compressed files, sorting their
+            # concatenation gives the same lines
+            return self._write_output(self._sort_lines(self._read_files(inputs), logger))
+            # end if
+
+        writer = hasattr(self.output_file, 'write') or bool(self.output_compression)
+        command = 'sort -m ' + self._gnu_options()
+        if self.output_file and not writer:
+            command += f'-o\'{self.output_file}\' '
+        command += ' '.join(f'\'{input}\'' for input in inputs)
+
+        logger.info(command)
+
+        my_shell = ShellCaller(error_as_exception=True)
+        if writer:
+            result = self._write_output(line[:-1] for line in my_shell.stream(command, logger, binary=True))
+            self._record_files(inputs)
+        else:
+            result = my_shell.call_and_parse(command, logger)
+            self._record_files(inputs, result)
+            # end if
+        self._record_child(my_shell)
+        return result
+        # end def
+
+    def _gnu_options(self, unique: bool = None,
+                     settings: Tuple[str, int, int] = None) -> str:
+
+        options = ''
+        if self.unique if unique is None else unique:
+            options += '-u '
         if self.ignore_leading_blanks:
-            command += '-b '
+            options += '-b '
         if self.ignore_case:
-            command += '-f '
+            options += '-f '
         if self.ignore_unprintable:
-            command += '-i '
-        if self.buffer_size:
-            command += f'-S{self.buffer_size} '
+            options += '-i '
+        buffer_size, parallel, batch_size = settings or self._tuned_settings()
+        if buffer_size:
+            options += f'-S{buffer_size} '
         if self.delimiter:
-            command += f'-t{self.delimiter} '
-        if self.parallel:
-            command += f'--parallel={self.parallel:d} '
+            options += f'-t{self.delimiter} '
+        if parallel:
+            options += f'--parallel={parallel:d} '
+        if batch_size:
+            options += f'--batch-size={batch_size:d} '
         if self.sort_key_option:
-            command += f'{self.sort_key_option} '
+            options += f'{self.sort_key_option} '
         if self.tempdir:
-            command += '-T\'{self.tempdir}\' '
-        if self.output_file:
-            command += f'-o\'{self.output_file}\' '
-        if self.input_file:
-            command += f'\'{self.input_file}\''
+            options += f'-T\'{self.tempdir}\' '
+        if self.compress_program:
+            options += f'--compress-program=\'{self.compress_program}\' '
 
-        logger.info(command)
+        return options
+        # end def
 
-        my_shell = ShellCaller(error_as_exception=True)
-        return my_shell.call_and_parse(command, logger)
+    def _key_options(self) -> dict:
+        return {'sort_key_option': self.sort_key_option,
+                'delimiter': self.delimiter,
+                'ignore_leading_blanks': self.ignore_leading_blanks,
+                'ignore_case': self.ignore_case,
+                'ignore_unprintable': self.ignore_unprintable}
+        # end def
+
+    def _python_engine(self, unique: bool = None,
+                       count: bool = False) -> SortEngine:
+
+        buffer_size, parallel, batch_size = self._tuned_settings()
+        engine = SortEngine(self._key_options(),
+                            parse_buffer_size(buffer_size),
+                            self.tempdir, batch_size, parallel,
+                            self.unique if unique is None else unique, count,
+                            program_compression(self.compress_program)
+                            if self.compress_program else None)
+        self.__engines.append(engine)
+        return engine
+        # end def
+
+    def _tuned_settings(self) -> Tuple[str, int, int]:
+
+        # buffer_size, parallel and batch_size with auto worked out
+        buffer_size = self.buffer_size
+        parallel = self.parallel
+        batch_size = self.batch_size
+        if AUTO not in (buffer_size, parallel):
+            return (buffer_size, parallel, batch_size)
+            # end if
+
+        input_size = self._input_size()
+        if parallel == AUTO:
+            parallel = tune_parallel(input_size)
+            # end if
+        if buffer_size == AUTO:
+            size = tune_buffer_size(input_size)
+            buffer_size = f'{max(1, size // MEBIBYTE)}M'
+            if input_size is not None and batch_size is None:
+                batch_size = tune_batch_size(input_size, size)
+                # end if
+            if input_size is not None and input_size * IN_MEMORY_FACTOR > size \
+                    and free_space(self.tempdir) < input_size:
+                logging.getLogger(__name__).warning(
+                    f'{self.tempdir or "tempdir"} may not hold the runs of {input_size} bytes, '
+                    'consider compress_program')
+                # end if
+            # end if
+        return (buffer_size, parallel, batch_size)
+        # end def
+
+    def _input_size(self) -> int:
+
+        # the uncompressed size of the input files, None for streams
+        if hasattr(self.input_file, 'read'):
+            return None
+            # end if
+        inputs = self._input_files()
+        if not inputs or not all(os.path.isfile(input) for input in inputs):
+            return None
+            # end if
+        return sum(os.path.getsize(input) * (COMPRESSION_RATIO if detect_compression(input) else 1)
+                   for input in inputs)
+        # end def
+
+    def _measured(self, function: Callable, *args: Any) -> Any:
+
+        self.__stats = SortStats()
+        self.__engines = []
+        started = time.perf_counter()
+        before = [resource.getrusage(who)
+                  for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+
+        result = function(*args)
+
+        after = [resource.getrusage(who)
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+        stats = self.__stats
+        stats.wall_time = time.perf_counter() - started
+        stats.cpu_time = sum(end.ru_utime - start.ru_utime + end.ru_stime - start.ru_stime
+                             for start, end in zip(before, after))
+        if stats.max_rss is None:
+            stats.max_rss = max(usage.ru_maxrss for usage in after)
+            # end if
+        if self.__engines:
+            stats.runs_spilled = sum(engine.runs_spilled for engine in self.__engines)
+            stats.merge_passes = sum(engine.merge_passes for engine in self.__engines)
+            # end if
+
+        self.__last_stats = stats
+        if self.stats_hook is not None:
+            self.stats_hook(stats)
+            # end if
+        return result
+        # end def
+
+    def _record_child(self, my_shell: ShellCaller):
+        if my_shell.last_rusage is not None:
+            self.__stats.max_rss = max(self.__stats.max_rss or 0,
+                                       my_shell.last_rusage.ru_maxrss)
+            # end if
+        # end def
+
+    def _record_files(self, inputs: List[str], result: str = None):
+
+        # files read and written by sort itself
+        self.__stats.bytes_read += sum(os.path.getsize(input) for input in inputs
+                                       if os.path.isfile(input))
+        if result is None:
+            return
+        elif self.output_file and os.path.isfile(self.output_file):
+            self.__stats.bytes_written += os.path.getsize(self.output_file)
+        elif result:
+            self.__stats.bytes_written += len(result[1:].encode(self.__encoding))
+            # end if
+        # end def
+
+    def _counted(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        stats = self.__stats
+        for line in lines:
+            stats.bytes_read += len(line) + 1
+            yield line
+            # end for
+        # end def
+
+    def _sort_python(self, logger: logging.Logger) -> str:
+
+        engine = self._python_engine()
+
+        logger.info(f'python sort {self.input_file} -> {self.output_file}')
+
+        # the whole input is consumed before the first line comes out,
+        # so the output may safely be one of the input files
+        return self._write_output(engine.sort(self._read_inputs()))
+        # end def
+
+    def _input_files(self) -> List[str]:
+
+        if not self.input_file:
+            return []
+        elif not isinstance(self.input_file, (str, os.PathLike)):
+            return [str(input) for input in self.input_file]
+            # end if
+
+        input = str(self.input_file)
+        if os.path.exists(input) or not re.search(r'[*?[]', input):
+            return [input]
+            # end if
+        matched = sorted(glob.glob(input))
+        if not matched:
+            raise FileNotFoundError(f'no input file matches {input}')
+            # end if
+        return matched
+        # end def
+
+    def _read_inputs(self) -> Iterator[bytes]:
+
+        if hasattr(self.input_file, 'read'):
+            yield from self._counted(read_lines(self.input_file))
+            return
+            # end if
+
+        inputs = self._input_files()
+        if not inputs:
+            with open(sys.stdin.fileno(), 'rb', closefd=False) as file:
+                yield from self._counted(read_lines(file))
+                # end with
+            # end if
+        yield from self._read_files(inputs)
+        # end def
+
+    def _read_files(self, inputs: List[str]) -> Iterator[bytes]:
+
+        for input in inputs:
+            with open_input(input) as file:
+                yield from self._counted(read_lines(file))
+                # end with
+            # end for
+        # end def
+
+    def _compressed_inputs(self) -> bool:
+        if hasattr(self.input_file, 'read'):
+            return False
+            # end if
+        return any(detect_compression(input) for input in self._input_files()
+                   if os.path.isfile(input))
+        # end def
+
+    def _streamed(self) -> bool:
+        return (hasattr(self.input_file, 'read') or hasattr(self.output_file, 'write')
+                or bool(self.output_compression) or self._compressed_inputs())
+        # end def
+
+    def _merge_python(self, inputs: List[str], logger: logging.Logger) -> str:
+
+        engine = self._python_engine()
+
+        logger.info(f'python merge {inputs} -> {self.output_file}')
+
+        # merged lines come out while the inputs are still read, so an
+        # output that is also an input is written aside and moved over
+        if isinstance(self.output_file, (str, os.PathLike)) and os.path.exists(self.output_file) \
+                and any(os.path.exists(input) and os.path.samefile(input, self.output_file)
+                        for input in inputs):
+            directory = os.path.dirname(os.path.abspath(self.output_file))
+            fd, temp = tempfile.mkstemp(prefix='pysort', dir=directory)
+            os.close(fd)
+            try:
+                result = self._write_output(engine.merge(inputs), temp)
+                os.replace(temp, self.output_file)
+            finally:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                    # end if
+                # end try
+            return result
+            # end if
+
+        return self._write_output(engine.merge(inputs))
+        # end def
+
+    def _write_output(self, lines: Iterator[bytes], output: str = None) -> str:
+
+        output = output or self.output_file
+        if hasattr(output, 'write'):
+            self.__stats.bytes_written += write_lines(output, lines)
+            return ''
+        elif not output:
+            result = bytearray()
+            for line in lines:
+                result += line + b'\n'
+                # end for
+            self.__stats.bytes_written += len(result)
+            return '\n' + ShellCaller()._decode_return(bytes(result)) if result else ''
+            # end if
+
+        first = next(lines, None)
+        with open_output(output, self.output_compression) as file:
+            if first is not None:
+                self.__stats.bytes_written += write_lines(file, [first])
+                self.__stats.bytes_written += write_lines(file, lines)
+                # end if
+            # end with
+
+        return ''
         # end def
     # end class
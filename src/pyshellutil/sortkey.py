@@ -0,0 +1,399 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = '1.0.0'
+# ---------------------------------------------------------------------------
+
+import re
+import shlex
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, List
+
+# GNU sort semantics in the C locale
+_BLANKS = b' \t'
+_FOLD_TABLE = bytes.maketrans(b'abcdefghijklmnopqrstuvwxyz',
+                              b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+_NONPRINTING = bytes(c for c in range(256) if not 0x20 <= c <= 0x7e)
+_NONDICTIONARY = bytes(c for c in range(256)
+                       if not (chr(c).isascii() and chr(c).isalnum())
+                       and c not in _BLANKS)
+_FIELD = re.compile(rb'[ \t]*[^ \t]*')
+_NUMBER = re.compile(rb'[ \t]*(-?)([0-9]*)(?:\.([0-9]*))?')
+_INTEGER = re.compile(rb'-?[0-9]+')
+_KEY_SPEC = re.compile(r'(\d+)(?:\.(\d+))?([a-zA-Z]*)'
+                       r'(?:,(\d+)(?:\.(\d+))?([a-zA-Z]*))?$')
+_SUPPORTED_MODIFIERS = set('bdfinr')
+
+
+class KeyField(object):
+
+    def __init__(self):
+        super(KeyField, self).__init__()
+
+        # zero based field and character of the key start
+        self.sword = 0
+        self.schar = 0
+        # zero based end field, None for the end of line
+        self.eword = None
+        # one based end character, 0 for the end of the field
+        self.echar = 0
+        self.skipsblanks = False
+        self.skipeblanks = False
+        self.fold = False
+        self.ignore = None
+        self.numeric = False
+        self.reverse = False
+        # end def
+
+    def has_ordering(self) -> bool:
+        return (self.skipsblanks or self.skipeblanks or self.fold
+                or self.ignore is not None or self.numeric)
+        # end def
+    # end class
+
+
+class _Reversed(object):
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+        # end def
+
+    def __lt__(self, other: '_Reversed') -> bool:
+        return other.value < self.value
+        # end def
+
+    def __eq__(self, other: '_Reversed') -> bool:
+        return self.value == other.value
+        # end def
+    # end class
+
+
+def parse_sort_key_option(option: str) -> List[KeyField]:
+
+    keys = []
+    if not option:
+        return keys
+        # end if
+
+    tokens = shlex.split(option)
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token in ('-k', '--key'):
+            index += 1
+            if index >= len(tokens):
+                raise ValueError(f'missing key specification after {token}')
+                # end if
+            spec = tokens[index]
+        elif token.startswith('--key='):
+            spec = token[len('--key='):]
+        elif token.startswith('-k'):
+            spec = token[2:]
+        else:
+            raise ValueError(f'unsupported sort option for python engine: {token}')
+            # end if
+        keys.append(_parse_key_spec(spec))
+        index += 1
+        # end while
+
+    return keys
+    # end def
+
+
+def _parse_key_spec(spec: str) -> KeyField:
+
+    matched = _KEY_SPEC.match(spec)
+    if matched is None:
+        raise ValueError(f'invalid key specification: {spec}')
+        # end if
+    sword, schar, sopts, eword, echar, eopts = matched.groups()
+
+    key = KeyField()
+    if int(sword) == 0:
+        raise ValueError(f'field number is zero: {spec}')
+        # end if
+    key.sword = int(sword) - 1
+    if schar is not None:
+        if int(schar) == 0:
+            raise ValueError(f'character offset is zero: {spec}')
+            # end if
+        key.schar = int(schar) - 1
+        # end if
+    _set_ordering(key, sopts, start=True)
+
+    if eword is not None:
+        if int(eword) == 0:
+            raise ValueError(f'field number is zero: {spec}')
+            # end if
+        key.eword = int(eword) - 1
+        key.echar = int(echar) if echar is not None else 0
+        _set_ordering(key, eopts, start=False)
+        # end if
+
+    if key.numeric and key.ignore is not None:
+        raise ValueError(f'numeric key cannot ignore characters: {spec}')
+        # end if
+
+    return key
+    # end def
+
+
+def _set_ordering(key: KeyField, modifiers: str, start: bool):
+
+    for modifier in modifiers or '':
+        if modifier not in _SUPPORTED_MODIFIERS:
+            raise ValueError(f'unsupported key modifier for python engine: {modifier}')
+        elif modifier == 'b':
+            if start:
+                key.skipsblanks = True
+            else:
+                key.skipeblanks = True
+                # end if
+        elif modifier == 'd':
+            key.ignore = _NONDICTIONARY
+        elif modifier == 'f':
+            key.fold = True
+        elif modifier == 'i':
+            if key.ignore is None:
+                key.ignore = _NONPRINTING
+                # end if
+        elif modifier == 'n':
+            key.numeric = True
+        elif modifier == 'r':
+            key.reverse = True
+            # end if
+        # end for
+    # end def
+
+
+def _begfield(line: bytes, lim: int, key: KeyField, tab: bytes) -> int:
+
+    ptr = 0
+    sword = key.sword
+    if tab is not None:
+        while ptr < lim and sword > 0:
+            sword -= 1
+            ptr = line.find(tab, ptr, lim)
+            ptr = lim if ptr < 0 else ptr + 1
+            # end while
+    else:
+        while ptr < lim and sword > 0:
+            sword -= 1
+            ptr = min(lim, _FIELD.match(line, ptr).end())
+            # end while
+        # end if
+
+    if key.skipsblanks:
+        while ptr < lim and line[ptr] in _BLANKS:
+            ptr += 1
+            # end while
+        # end if
+
+    return min(lim, ptr + key.schar)
+    # end def
+
+
+def _limfield(line: bytes, lim: int, key: KeyField, tab: bytes) -> int:
+
+    if key.eword is None:
+        return lim
+        # end if
+
+    ptr = 0
+    eword = key.eword
+    echar = key.echar
+    if echar == 0:
+        eword += 1
+        # end if
+
+    if tab is not None:
+        while ptr < lim and eword > 0:
+            eword -= 1
+            ptr = line.find(tab, ptr, lim)
+            if ptr < 0:
+                ptr = lim
+            elif eword or echar:
+                ptr += 1
+                # end if
+            # end while
+    else:
+        while ptr < lim and eword > 0:
+            eword -= 1
+            ptr = min(lim, _FIELD.match(line, ptr).end())
+            # end while
+        # end if
+
+    if echar != 0:
+        if key.skipeblanks:
+            while ptr < lim and line[ptr] in _BLANKS:
+                ptr += 1
+                # end while
+            # end if
+        ptr = min(lim, ptr + echar)
+        # end if
+
+    return ptr
+    # end def
+
+
+def _numeric_value(text: bytes) -> Any:
+
+    if _INTEGER.fullmatch(text):
+        # the common case, ints compare exactly against Decimal
+        return int(text)
+        # end if
+    sign, integer, fraction = _NUMBER.match(text).groups()
+    if not integer and not fraction:
+        return 0
+        # end if
+    return Decimal(f'{sign.decode()}{integer.decode() or 0}.{(fraction or b"").decode() or 0}')
+    # end def
+
+
+def _compile_value(key: KeyField) -> Callable:
+
+    if key.numeric:
+        value = _numeric_value
+    elif key.fold or key.ignore is not None:
+        table = _FOLD_TABLE if key.fold else None
+        delete = key.ignore or b''
+
+        def value(text: bytes) -> bytes:
+            return text.translate(table, delete)
+            # end def
+    else:
+        value = None
+        # end if
+
+    if not key.reverse:
+        return value
+        # end if
+    if value is None:
+        return _Reversed
+        # end if
+
+    def reversed_value(text: bytes) -> _Reversed:
+        return _Reversed(value(text))
+        # end def
+
+    return reversed_value
+    # end def
+
+
+def _compile_split_extractor(key: KeyField, tab: bytes) -> Callable:
+
+    # whole fields of a delimited line, the slice of the split fields
+    # covers exactly what begfield and limfield would select
+    start = key.sword
+    stop = None if key.eword is None else key.eword + 1
+    if stop is not None and stop <= start:
+        return lambda fields: b''
+        # end if
+    if stop == start + 1 and not key.skipsblanks:
+        return lambda fields: fields[start] if start < len(fields) else b''
+        # end if
+    if key.skipsblanks:
+        return lambda fields: tab.join(fields[start:stop]).lstrip(_BLANKS)
+        # end if
+    return lambda fields: tab.join(fields[start:stop])
+    # end def
+
+
+def _compile_extractor(key: KeyField, tab: bytes) -> Callable:
+
+    def extractor(line: bytes) -> bytes:
+        lim = len(line)
+        beg = _begfield(line, lim, key, tab)
+        return line[beg:max(beg, _limfield(line, lim, key, tab))]
+        # end def
+
+    return extractor
+    # end def
+
+
+def _compile_keys(keys: List[KeyField], tab: bytes,
+                  last_resort: bool) -> Callable:
+
+    values = [_compile_value(key) for key in keys]
+
+    if tab is not None and all(key.schar == 0 and key.echar == 0 for key in keys):
+        extractors = [_compile_split_extractor(key, tab) for key in keys]
+        pairs = list(zip(extractors, values))
+        if len(pairs) == 1:
+            extract, value = pairs[0]
+            if value is None and not last_resort:
+                return lambda line: extract(line.split(tab))
+            elif value is None:
+                return lambda line: (extract(line.split(tab)), line)
+            elif not last_resort:
+                return lambda line: value(extract(line.split(tab)))
+                # end if
+            return lambda line: (value(extract(line.split(tab))), line)
+            # end if
+
+        def split_key(line: bytes) -> tuple:
+            fields = line.split(tab)
+            parts = [extract(fields) if value is None else value(extract(fields))
+                     for extract, value in pairs]
+            if last_resort:
+                parts.append(line)
+                # end if
+            return tuple(parts)
+            # end def
+
+        return split_key
+        # end if
+
+    pairs = list(zip([_compile_extractor(key, tab) for key in keys], values))
+
+    def generic_key(line: bytes) -> tuple:
+        parts = [extract(line) if value is None else value(extract(line))
+                 for extract, value in pairs]
+        if last_resort:
+            parts.append(line)
+            # end if
+        return tuple(parts)
+        # end def
+
+    return generic_key
+    # end def
+
+
+@lru_cache(maxsize=256)
+def make_sort_key(sort_key_option: str = None, delimiter: str = None,
+                  ignore_leading_blanks: bool = False,
+                  ignore_case: bool = False,
+                  ignore_unprintable: bool = False,
+                  last_resort: bool = True) -> Callable:
+
+    keys = parse_sort_key_option(sort_key_option)
+
+    # keys without any ordering option inherit the global ones
+    for key in keys:
+        if not key.has_ordering() and not key.reverse:
+            key.skipsblanks = key.skipeblanks = ignore_leading_blanks
+            key.fold = ignore_case
+            key.ignore = _NONPRINTING if ignore_unprintable else None
+            # end if
+        # end for
+
+    if not keys and (ignore_leading_blanks or ignore_case or ignore_unprintable):
+        key = KeyField()
+        key.skipsblanks = key.skipeblanks = ignore_leading_blanks
+        key.fold = ignore_case
+        key.ignore = _NONPRINTING if ignore_unprintable else None
+        keys.append(key)
+        # end if
+
+    if not keys:
+        # plain byte order of the whole line
+        return None if last_resort else (lambda line: line)
+        # end if
+
+    return _compile_keys(keys, delimiter.encode() if delimiter else None,
+                         last_resort)
+    # end def
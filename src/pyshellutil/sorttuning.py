@@ -0,0 +1,142 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = '1.0.0'
+# ---------------------------------------------------------------------------
+
+import math
+import os
+import resource
+import shutil
+import tempfile
+
+AUTO = 'auto'
+MEBIBYTE = 1024 * 1024
+# share of the available memory given to the sort buffer, the rest is
+# left to the page cache that spilled runs are read back through
+MEMORY_FRACTION = 0.5
+MIN_BUFFER_SIZE = 16 * MEBIBYTE
+# in-memory size of the lines against their size on disk
+IN_MEMORY_FACTOR = 2
+# rough ratio of text compressed with gzip and the like
+COMPRESSION_RATIO = 4
+# below this much input, extra sort threads or workers cost more than they save
+MIN_PARALLEL_INPUT = 64 * MEBIBYTE
+# GNU sort does not use more by default either
+MAX_PARALLEL = 8
+DEFAULT_FAN_IN = 16
+MAX_FAN_IN = 256
+
+
+def _read_int(path: str) -> int:
+
+    # None when the file is missing or holds no limit
+    try:
+        with open(path) as file:
+            value = file.read().split()[0]
+            # end with
+    except (OSError, IndexError):
+        return None
+        # end try
+    return int(value) if value.isdigit() else None
+    # end def
+
+
+def available_memory() -> int:
+
+    memory = None
+    try:
+        with open('/proc/meminfo') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    memory = int(line.split()[1]) * 1024
+                    break
+                    # end if
+                # end for
+            # end with
+    except OSError:
+        pass
+        # end try
+    if memory is None:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+        # end if
+
+    # a container is killed at its cgroup limit well before the host runs out
+    for limit_path, usage_path in (('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+                                   ('/sys/fs/cgroup/memory/memory.limit_in_bytes',
+                                    '/sys/fs/cgroup/memory/memory.usage_in_bytes')):
+        limit = _read_int(limit_path)
+        if limit is not None and limit < memory:
+            memory = max(0, limit - (_read_int(usage_path) or 0))
+            # end if
+        # end for
+    return memory
+    # end def
+
+
+def available_cpus() -> int:
+
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+        # end if
+
+    # a CPU quota throttles threads beyond it without any error
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()[:2]
+            # end with
+    except (OSError, ValueError):
+        quota = _read_int('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = _read_int('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        # end try
+    if quota not in (None, 'max') and period:
+        cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+        # end if
+    return cpus
+    # end def
+
+
+def free_space(tempdir: str = None) -> int:
+    return shutil.disk_usage(tempdir or tempfile.gettempdir()).free
+    # end def
+
+
+def tune_buffer_size(input_size: int = None, memory: int = None) -> int:
+
+    budget = int((available_memory() if memory is None else memory) * MEMORY_FRACTION)
+    budget = max(MEBIBYTE, budget)
+    if input_size is None:
+        # unknown input such as a pipe, take what can be spared
+        return budget
+        # end if
+
+    # the whole input in one in-memory sort when it fits, otherwise the
+    # largest buffer makes the fewest runs and merge passes
+    return max(min(MIN_BUFFER_SIZE, budget), min(budget, input_size * IN_MEMORY_FACTOR))
+    # end def
+
+
+def tune_parallel(input_size: int = None, cpus: int = None) -> int:
+
+    if input_size is not None and input_size < MIN_PARALLEL_INPUT:
+        return 1
+        # end if
+    return max(1, min(MAX_PARALLEL, available_cpus() if cpus is None else cpus))
+    # end def
+
+
+def tune_batch_size(input_size: int, buffer_size: int) -> int:
+
+    # None keeps the default fan in, a wider one merges every run in a
+    # single pass as long as the open files allow it
+    runs = math.ceil(input_size * IN_MEMORY_FACTOR / buffer_size)
+    if runs <= DEFAULT_FAN_IN:
+        return None
+        # end if
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = MAX_FAN_IN if soft == resource.RLIM_INFINITY else min(MAX_FAN_IN, soft // 4)
+    return max(DEFAULT_FAN_IN, min(runs, limit))
+    # end def
@@ -0,0 +1,138 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# __author__ = 'Satoshi Imai'
+# __credits__ = ['Satoshi Imai']
+# __version__ = "0.9.0"
+# ---------------------------------------------------------------------------
+
+import asyncio
+import logging
+import shutil
+import tempfile
+import time
+from logging import Logger, StreamHandler
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from src.pyshellutil import (AsyncShellCaller, SubprocessBatchErrorException,
+                             SubprocessErrorException)
+
+
+@pytest.fixture(scope='module')
+def logger() -> Generator[Logger, None, None]:
+    log = logging.getLogger(__name__)
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s : %(message)s')
+    s_handler = StreamHandler()
+    s_handler.setLevel(logging.INFO)
+    s_handler.setFormatter(formatter)
+    log.addHandler(s_handler)
+
+    yield log
+    # end def
+
+
+@pytest.fixture(scope='session')
+def tempdir() -> Generator[Path, None, None]:
+
+    tempdir = Path(tempfile.mkdtemp())
+    yield tempdir
+    if tempdir.exists():
+        shutil.rmtree(tempdir)
+        # end if
+    # end def
+
+
+@pytest.mark.run(order=10)
+def test_init_and_call(tempdir: Path, logger: Logger):
+    logger.info('init_and_call')
+
+    my_shell = AsyncShellCaller()
+
+    return_code, stdout, stderr = asyncio.run(
+        my_shell.call_subprocess(f'ls -a {tempdir}'))
+    assert return_code == 0
+    assert stdout == b'.\n..\n'
+    assert stderr == b''
+
+    return_code, stdout, stderr = asyncio.run(
+        my_shell.call_subprocess(['ls', '-a', str(tempdir)]))
+    assert return_code == 0
+    assert stdout == b'.\n..\n'
+    # end def
+
+
+@pytest.mark.run(order=20)
+def test_call_and_parse(tempdir: Path, logger: Logger):
+    logger.info('call_and_parse')
+
+    my_shell = AsyncShellCaller(error_as_exception=False)
+
+    result = asyncio.run(my_shell.call_and_parse(f'ls -a {tempdir}', logger))
+
+    assert result == '\n.\n..\n'
+    # end def
+
+
+@pytest.mark.run(order=30)
+def test_call_and_parse_with_exception(tempdir: Path, logger: Logger):
+    logger.info('call_and_parse_with_exception')
+
+    my_shell = AsyncShellCaller(error_as_exception=True)
+    dummy_path = str(tempdir.joinpath('dummy_file'))
+
+    with pytest.raises(SubprocessErrorException):
+        asyncio.run(my_shell.call_and_parse(f'rm {dummy_path}', logger))
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=40)
+def test_max_concurrency(tempdir: Path, logger: Logger):
+    logger.info('max_concurrency')
+
+    with pytest.raises(ValueError):
+        AsyncShellCaller(max_concurrency=0)
+        # end with
+
+    my_shell = AsyncShellCaller(max_concurrency=2)
+    assert my_shell.max_concurrency == 2
+
+    async def run_all():
+        return await asyncio.gather(
+            *[my_shell.call_and_parse('sleep 0.2; echo done') for _ in range(4)])
+        # end def
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+    elapsed = time.monotonic() - start
+
+    assert results == ['\ndone\n'] * 4
+    # four jobs through two slots take at least two rounds
+    assert elapsed >= 0.4
+
+    # the caller can be reused from another event loop
+    assert asyncio.run(run_all()) == ['\ndone\n'] * 4
+    # end def
+
+
+@pytest.mark.run(order=50)
+def test_call_many(tempdir: Path, logger: Logger):
+    logger.info('call_many')
+
+    my_shell = AsyncShellCaller(max_concurrency=2)
+    dummy_path = str(tempdir.joinpath('dummy_file'))
+
+    results = asyncio.run(my_shell.call_many(['echo 0', 'echo 1'],
+                                             logger=logger))
+    assert results == ['\n0\n', '\n1\n']
+
+    with pytest.raises(SubprocessBatchErrorException) as e:
+        asyncio.run(my_shell.call_many(['echo 0', f'rm {dummy_path}'],
+                                       fail_fast=False, logger=logger))
+        # end with
+    assert list(e.value.errors.keys()) == [1]
+    assert e.value.results == ['\n0\n', None]
+    # end def
@@ -0,0 +1,82 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# author = 'Satoshi Imai'
+# credits = ['Satoshi Imai']
+# version = "1.0.0"
+# ---------------------------------------------------------------------------
+
+import logging
+import shutil
+import tempfile
+from logging import Logger, StreamHandler
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from src.pyshellutil.compression import (COMPRESSIONS, detect_compression,
+                                         open_input, open_output,
+                                         program_compression)
+
+
+@pytest.fixture(scope='module')
+def logger() -> Generator[Logger, None, None]:
+    log = logging.getLogger(__name__)
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s : %(message)s')
+    s_handler = StreamHandler()
+    s_handler.setLevel(logging.INFO)
+    s_handler.setFormatter(formatter)
+    log.addHandler(s_handler)
+
+    yield log
+    # end def
+
+
+@pytest.fixture(scope='session')
+def tempdir() -> Generator[Path, None, None]:
+
+    tempdir = Path(tempfile.mkdtemp())
+    yield tempdir
+    if tempdir.exists():
+        shutil.rmtree(tempdir)
+        # end if
+    # end def
+
+
+@pytest.mark.run(order=10)
+@pytest.mark.parametrize('compression', (None,) + COMPRESSIONS)
+def test_round_trip(compression: str, tempdir: Path, logger: Logger):
+    logger.info('round_trip')
+
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+        # end if
+
+    path = tempdir.joinpath(f'round_trip_{compression}')
+    with open_output(str(path), compression) as file:
+        file.write(b'b\na\n' * 1000)
+        # end with
+
+    assert detect_compression(str(path)) == compression
+    with open_input(str(path)) as file:
+        assert file.read() == b'b\na\n' * 1000
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=20)
+def test_program_compression(logger: Logger):
+    logger.info('program_compression')
+
+    assert program_compression('gzip') == 'gzip'
+    assert program_compression('/usr/bin/pigz') == 'gzip'
+    assert program_compression('zstd') == 'zstd'
+
+    with pytest.raises(ValueError):
+        program_compression('lzop')
+        # end with
+    with pytest.raises(ValueError):
+        open_output('unused', 'lz4')
+        # end with
+    # end def
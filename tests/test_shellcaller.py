@@ -14,7 +14,8 @@ from typing import Any, Generator
 
 import pytest
 
-from src.pyshellutil import ShellCaller, SubprocessErrorException
+from src.pyshellutil import (ShellCaller, SubprocessBatchErrorException,
+                             SubprocessErrorException)
 
 
 @pytest.fixture(scope='session', autouse=True)
@@ -146,3 +147,131 @@ def test__decode_return(input: Any, expected: str,
 
     assert result == expected
     # end def
+
+
+@pytest.mark.run(order=80)
+def test_stream(tempdir: Path, logger: Logger):
+    logger.info('stream')
+
+    my_shell = ShellCaller()
+
+    result = list(my_shell.stream(f'ls -a {tempdir}', logger))
+    assert result == ['.\n', '..\n']
+
+    result = list(my_shell.stream('printf "a\\nb"', binary=True))
+    assert result == [b'a\n', b'b']
+
+    result = list(my_shell.stream('printf "abcde"', chunk_size=2))
+    assert result == [b'ab', b'cd', b'e']
+    # end def
+
+
+@pytest.mark.run(order=90)
+def test_stream_large_stderr(tempdir: Path, logger: Logger):
+    logger.info('stream_large_stderr')
+
+    my_shell = ShellCaller(error_as_exception=False)
+
+    # enough stderr to fill the pipe if it was not drained concurrently
+    command = 'head -c 1000000 /dev/zero >&2; seq 3'
+    result = list(my_shell.stream(command, logger))
+    assert result == ['1\n', '2\n', '3\n']
+    # end def
+
+
+@pytest.mark.run(order=100)
+def test_stream_with_exception(tempdir: Path, logger: Logger):
+    logger.info('stream_with_exception')
+
+    my_shell = ShellCaller(error_as_exception=True)
+    dummy_path = str(tempdir.joinpath('dummy_file'))
+
+    with pytest.raises(SubprocessErrorException):
+        for _ in my_shell.stream(f'echo before; rm {dummy_path}', logger):
+            pass
+            # end for
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=110)
+def test_stream_close_early(tempdir: Path, logger: Logger):
+    logger.info('stream_close_early')
+
+    my_shell = ShellCaller()
+
+    generator = my_shell.stream('yes', logger)
+    assert next(generator) == 'y\n'
+    generator.close()
+    # end def
+
+
+@pytest.mark.run(order=120)
+def test_call_many(tempdir: Path, logger: Logger):
+    logger.info('call_many')
+
+    my_shell = ShellCaller()
+
+    commands = [f'sleep 0.{3 - index}; echo {index}' for index in range(3)]
+    results = my_shell.call_many(commands, max_workers=3, logger=logger)
+    assert results == ['\n0\n', '\n1\n', '\n2\n']
+
+    completed = list(my_shell.iter_many(commands, max_workers=3))
+    assert completed == [(2, '\n2\n'), (1, '\n1\n'), (0, '\n0\n')]
+    # end def
+
+
+@pytest.mark.run(order=130)
+def test_call_many_fail_fast(tempdir: Path, logger: Logger):
+    logger.info('call_many_fail_fast')
+
+    my_shell = ShellCaller()
+    dummy_path = str(tempdir.joinpath('dummy_file'))
+    marker = tempdir.joinpath('marker')
+
+    commands = [f'rm {dummy_path}', 'sleep 0.5', f'touch {marker}']
+    with pytest.raises(SubprocessErrorException) as e:
+        my_shell.call_many(commands, max_workers=1, logger=logger)
+        # end with
+
+    assert not isinstance(e.value, SubprocessBatchErrorException)
+    # the last command was never started
+    assert not marker.exists()
+    # end def
+
+
+@pytest.mark.run(order=140)
+def test_call_many_collect_all(tempdir: Path, logger: Logger):
+    logger.info('call_many_collect_all')
+
+    my_shell = ShellCaller()
+    dummy_path = str(tempdir.joinpath('dummy_file'))
+
+    commands = ['echo 0', f'rm {dummy_path}', 'echo 2']
+    with pytest.raises(SubprocessBatchErrorException) as e:
+        my_shell.call_many(commands, max_workers=2, fail_fast=False,
+                           logger=logger)
+        # end with
+
+    assert list(e.value.errors.keys()) == [1]
+    assert isinstance(e.value.errors[1], SubprocessErrorException)
+    assert e.value.results == ['\n0\n', None, '\n2\n']
+    # end def
+
+
+@pytest.mark.run(order=150)
+def test_last_rusage(logger: Logger):
+    logger.info('last_rusage')
+
+    my_shell = ShellCaller()
+    assert my_shell.last_rusage is None
+
+    # the child's own usage, reaped with wait4
+    result = my_shell.call_subprocess('head -c 20000000 /dev/zero | wc -c; exit 3')
+    assert result[0] == 3
+    assert result[1] == b'20000000\n'
+    assert my_shell.last_rusage.ru_maxrss > 0
+
+    assert list(my_shell.stream('echo 1')) == ['1\n']
+    assert my_shell.last_rusage.ru_utime >= 0
+    # end def
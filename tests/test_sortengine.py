@@ -0,0 +1,169 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# author = 'Satoshi Imai'
+# credits = ['Satoshi Imai']
+# version = "1.0.0"
+# ---------------------------------------------------------------------------
+
+import io
+import logging
+import random
+import shutil
+import tempfile
+from logging import Logger, StreamHandler
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from src.pyshellutil.sortengine import (SortEngine, parse_buffer_size,
+                                        read_lines, write_lines)
+from src.pyshellutil.sortkey import make_sort_key
+
+
+@pytest.fixture(scope='module')
+def logger() -> Generator[Logger, None, None]:
+    log = logging.getLogger(__name__)
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s : %(message)s')
+    s_handler = StreamHandler()
+    s_handler.setLevel(logging.INFO)
+    s_handler.setFormatter(formatter)
+    log.addHandler(s_handler)
+
+    yield log
+    # end def
+
+
+@pytest.fixture(scope='session')
+def tempdir() -> Generator[Path, None, None]:
+
+    tempdir = Path(tempfile.mkdtemp())
+    yield tempdir
+    if tempdir.exists():
+        shutil.rmtree(tempdir)
+        # end if
+    # end def
+
+
+@pytest.mark.run(order=10)
+def test_parse_buffer_size(logger: Logger):
+    logger.info('parse_buffer_size')
+
+    assert parse_buffer_size('40M') == 40 * 1024 * 1024
+    assert parse_buffer_size('2G') == 2 * 1024 * 1024 * 1024
+    assert parse_buffer_size(None) > 0
+
+    with pytest.raises(ValueError):
+        parse_buffer_size('M')
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=20)
+def test_read_write_lines(logger: Logger):
+    logger.info('read_write_lines')
+
+    lines = list(read_lines(io.BytesIO(b'b\na\n\nc')))
+    assert lines == [b'b', b'a', b'', b'c']
+
+    output = io.BytesIO()
+    write_lines(output, lines)
+    assert output.getvalue() == b'b\na\n\nc\n'
+    # end def
+
+
+@pytest.mark.run(order=30)
+@pytest.mark.parametrize('fan_in', [2, 3, 16])
+def test_external_sort(fan_in: int, tempdir: Path, logger: Logger):
+    logger.info('external_sort')
+
+    generator = random.Random(fan_in)
+    lines = [f'{generator.randint(0, 50)},{index}'.encode() for index in range(5000)]
+
+    # a tiny buffer produces dozens of runs and several merge passes
+    key_options = {'sort_key_option': '-k1,1n', 'delimiter': ',',
+                   'last_resort': False}
+    engine = SortEngine(key_options, 4096, str(tempdir), fan_in)
+    result = list(engine.sort(iter(lines)))
+    key = make_sort_key(**key_options)
+
+    # equal keys keep their input order across runs and passes
+    assert result == sorted(lines, key=key)
+    assert not list(tempdir.iterdir())
+    # end def
+
+
+@pytest.mark.run(order=40)
+def test_external_sort_closed_early(tempdir: Path, logger: Logger):
+    logger.info('external_sort_closed_early')
+
+    lines = [str(index).encode() for index in range(2000, 0, -1)]
+    engine = SortEngine(None, 1024, str(tempdir), 2)
+
+    sorted_lines = engine.sort(iter(lines))
+    assert next(sorted_lines) == b'1'
+    sorted_lines.close()
+
+    assert not list(tempdir.iterdir())
+
+    with pytest.raises(ValueError):
+        SortEngine(None, 1024, str(tempdir), 1)
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=50)
+@pytest.mark.parametrize('buffer_size', [4096, 1024 * 1024])
+def test_parallel_sort(buffer_size: int, tempdir: Path, logger: Logger):
+    logger.info('parallel_sort')
+
+    generator = random.Random(buffer_size)
+    lines = [f'{generator.randint(0, 50)},{index}'.encode() for index in range(20000)]
+
+    key_options = {'sort_key_option': '-k1,1n', 'delimiter': ',',
+                   'last_resort': False}
+    engine = SortEngine(key_options, buffer_size, str(tempdir), 4, parallel=3)
+    result = list(engine.sort(iter(lines)))
+
+    assert result == sorted(lines, key=make_sort_key(**key_options))
+    assert not list(tempdir.iterdir())
+
+    with pytest.raises(ValueError):
+        SortEngine(key_options, buffer_size, str(tempdir), parallel=0)
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=60)
+@pytest.mark.parametrize('parallel', [1, 2])
+def test_unique_and_count(parallel: int, tempdir: Path, logger: Logger):
+    logger.info('unique_and_count')
+
+    generator = random.Random(parallel)
+    lines = [f'{generator.randint(0, 30)},{generator.randint(0, 2)}'.encode()
+             for _ in range(20000)]
+
+    # duplicates collapse in every spilled run, so far less than the
+    # input reaches the final merge
+    key_options = {'sort_key_option': '-k1,1n', 'delimiter': ','}
+    engine = SortEngine(key_options, 4096, str(tempdir), 4, parallel, unique=True)
+    key = make_sort_key(**dict(key_options, last_resort=False))
+    expected = {}
+    for line in lines:
+        expected.setdefault(key(line), line)
+        # end for
+    assert list(engine.sort(iter(lines))) == [expected[value] for value in sorted(expected)]
+
+    engine = SortEngine(None, 4096, str(tempdir), 4, parallel, count=True)
+    counts = {}
+    for line in lines:
+        counts[line] = counts.get(line, 0) + 1
+        # end for
+    assert list(engine.sort(iter(lines))) == [(counts[line], line) for line in sorted(counts)]
+    assert not list(tempdir.iterdir())
+
+    with pytest.raises(ValueError):
+        list(engine.merge([]))
+        # end with
+    # end def
@@ -5,8 +5,13 @@
 # version = "0.9.0"
 # ---------------------------------------------------------------------------
 
+import bz2
+import gzip
+import io
 import logging
+import random
 import shutil
+import subprocess
 import tempfile
 from logging import Logger, StreamHandler
 from pathlib import Path
@@ -75,6 +80,7 @@ def test_init(logger: Logger):
 
     my_sort = Sorter()
 
+    assert my_sort.engine == 'gnu'
     assert my_sort.delimiter is None
     assert my_sort.ignore_leading_blanks is False
     assert my_sort.ignore_case is False
@@ -85,6 +91,7 @@ def test_init(logger: Logger):
     assert my_sort.input_file is None
     assert my_sort.sort_key_option is None
     assert my_sort.parallel is None
+    assert my_sort.batch_size is None
     # end def
 
 
@@ -240,3 +247,610 @@ def test_sort(tempdir: Path, logger: Logger):
 
     assert result == expected_string
     # end def
+
+
+def make_random_lines(count: int, seed: int = 1) -> bytes:
+    generator = random.Random(seed)
+    alphabet = b'aAbBzZ _-.09\t\x01\xe3~'
+
+    def field() -> bytes:
+        dice = generator.random()
+        if dice < 0.3:
+            return str(generator.choice([generator.randint(-1000, 1000),
+                                         generator.random() * 100 - 50])).encode()
+        elif dice < 0.4:
+            return b' ' * generator.randint(0, 2) + str(generator.randint(-50, 50)).encode()
+        else:
+            return bytes(generator.choice(alphabet)
+                         for _ in range(generator.randint(0, 5)))
+            # end if
+        # end def
+
+    lines = [b','.join(field() for _ in range(4)) for _ in range(count)]
+    return b'\n'.join(lines + [b'a', b'a\t', b'A', b'-0', b'0', b''])
+    # end def
+
+
+@pytest.mark.run(order=121)
+def test_set_batch_size(logger: Logger):
+    logger.info('set_batch_size')
+
+    my_sort = Sorter()
+    my_sort.batch_size = 4
+    assert my_sort.batch_size == 4
+
+    with pytest.raises(ValueError):
+        my_sort.batch_size = 1
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=125)
+def test_set_engine(logger: Logger):
+    logger.info('set_engine')
+
+    my_sort = Sorter(engine='python')
+    assert my_sort.engine == 'python'
+    my_sort.engine = 'gnu'
+    assert my_sort.engine == 'gnu'
+
+    with pytest.raises(ValueError):
+        my_sort.engine = 'quick'
+        # end with
+    with pytest.raises(ValueError):
+        Sorter(engine='quick')
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=140)
+def test_sort_python(tempdir: Path, logger: Logger):
+    logger.info('sort_python')
+
+    after = tempdir.joinpath('after_python.txt')
+
+    my_sort = Sorter(engine='python')
+    my_sort.buffer_size = '40M'
+    my_sort.ignore_case = True
+    my_sort.ignore_leading_blanks = True
+    my_sort.ignore_unprintable = True
+    my_sort.tempdir = str(tempdir)
+    my_sort.sort(str(tempdir.joinpath('before.txt')),
+                 after, '-k4,4 -k1,3', ',')
+
+    with open(after, 'r') as file:
+        result = file.read()
+        # end with
+
+    assert result == expected_string
+
+    my_sort.output_file = None
+    assert my_sort.sort() == '\n' + expected_string
+    # end def
+
+
+@pytest.mark.run(order=150)
+@pytest.mark.parametrize(
+    'sort_key,delimiter,blanks,case,unprintable',
+    [(None, None, False, False, False),
+     (None, None, True, True, True),
+     ('-k2,2', ',', False, False, False),
+     ('-k2,2n -k1,1r', ',', False, False, False),
+     ('-k3.2,3.3', ',', True, False, False),
+     ('-k2nr', ',', False, False, False),
+     ('-k1,1f -k3', ',', False, False, True),
+     ('-k2b,2 -k1.2b,1.3', None, False, True, False),
+     ('-k1,1d', ',', False, False, False),
+     ('-k2,2 -k1.3,3.1bi', None, False, True, False),
+     ('-k4,4 -k1,3', ',', True, True, True)])
+def test_sort_python_matches_gnu(sort_key: str, delimiter: str,
+                                 blanks: bool, case: bool, unprintable: bool,
+                                 tempdir: Path, logger: Logger,
+                                 monkeypatch: pytest.MonkeyPatch):
+    logger.info('sort_python_matches_gnu')
+
+    # byte order comparison is what the python engine implements
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('random.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(2000))
+        # end with
+
+    results = {}
+    for engine in ('gnu', 'python'):
+        after = tempdir.joinpath(f'random_{engine}.txt')
+        my_sort = Sorter(engine=engine)
+        my_sort.ignore_leading_blanks = blanks
+        my_sort.ignore_case = case
+        my_sort.ignore_unprintable = unprintable
+        my_sort.sort(str(before), str(after), sort_key, delimiter)
+        with open(after, 'rb') as file:
+            results[engine] = file.read()
+            # end with
+        # end for
+
+    assert results['python'] == results['gnu']
+    # end def
+
+
+@pytest.mark.run(order=160)
+@pytest.mark.parametrize('parallel', [None, 2])
+def test_sort_python_external(parallel: int, tempdir: Path, logger: Logger,
+                              monkeypatch: pytest.MonkeyPatch):
+    logger.info('sort_python_external')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('random_large.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(60000, seed=2))
+        # end with
+
+    results = {}
+    for engine in ('gnu', 'python'):
+        after = tempdir.joinpath(f'random_large_{engine}.txt')
+        my_sort = Sorter(engine=engine)
+        my_sort.buffer_size = '1M'
+        my_sort.batch_size = 2
+        my_sort.parallel = parallel
+        my_sort.tempdir = str(tempdir)
+        my_sort.sort(str(before), str(after), '-k2,2n -k3', ',')
+        with open(after, 'rb') as file:
+            results[engine] = file.read()
+            # end with
+        # end for
+
+    assert results['python'] == results['gnu']
+    # spilled runs are cleaned up
+    assert not list(tempdir.glob('pysort*'))
+    # end def
+
+
+@pytest.mark.run(order=170)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_merge(engine: str, tempdir: Path, logger: Logger,
+               monkeypatch: pytest.MonkeyPatch):
+    logger.info('merge')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    lines = make_random_lines(3000, seed=3).split(b'\n')[:-1]
+    shards = []
+    for index in range(7):
+        shard = tempdir.joinpath(f'shard_{engine}_{index}.txt')
+        with open(shard, 'wb') as file:
+            file.write(b'\n'.join(lines[index::7]) + b'\n')
+            # end with
+        my_sort = Sorter(engine=engine)
+        my_sort.sort(str(shard), str(shard), '-k2,2n -k1,1', ',')
+        shards.append(str(shard))
+        # end for
+    before = [Path(shard).read_bytes() for shard in shards]
+
+    after = tempdir.joinpath(f'merged_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.batch_size = 3
+    my_sort.tempdir = str(tempdir)
+    my_sort.merge(shards, str(after), '-k2,2n -k1,1', ',')
+
+    expected = tempdir.joinpath(f'merged_expected_{engine}.txt')
+    my_sort = Sorter()
+    with open(expected, 'wb') as file:
+        file.write(b'\n'.join(lines) + b'\n')
+        # end with
+    my_sort.sort(str(expected), str(expected), '-k2,2n -k1,1', ',')
+
+    assert after.read_bytes() == expected.read_bytes()
+    # merging never touches the inputs
+    assert [Path(shard).read_bytes() for shard in shards] == before
+
+    # the output may be one of the inputs
+    my_sort.engine = engine
+    my_sort.merge(shards[:2], shards[0])
+    assert len(Path(shards[0]).read_bytes()) == len(before[0]) + len(before[1])
+    # end def
+
+
+@pytest.mark.run(order=180)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_sort_multiple_inputs(engine: str, tempdir: Path, logger: Logger,
+                              monkeypatch: pytest.MonkeyPatch):
+    logger.info('sort_multiple_inputs')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    daily = tempdir.joinpath(f'daily_{engine}')
+    daily.mkdir()
+    lines = make_random_lines(1000, seed=4).split(b'\n')[:-1]
+    for index in range(5):
+        with open(daily.joinpath(f'log_{index}.txt'), 'wb') as file:
+            # the last newline of a file is optional
+            file.write(b'\n'.join(lines[index::5]))
+            # end with
+        # end for
+    expected = b''.join(line + b'\n' for line in sorted(lines))
+
+    after = tempdir.joinpath(f'daily_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.tempdir = str(tempdir)
+    my_sort.sort(sorted(str(path) for path in daily.iterdir()), str(after))
+    assert after.read_bytes() == expected
+
+    my_sort.sort(str(daily.joinpath('log_*.txt')), str(after))
+    assert after.read_bytes() == expected
+
+    # the file list given to GNU sort is removed
+    assert not list(tempdir.glob('files0*'))
+
+    with pytest.raises(FileNotFoundError):
+        my_sort.sort(str(daily.joinpath('nothing_*.txt')), str(after))
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=190)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_sort_iter(engine: str, tempdir: Path, logger: Logger,
+                   monkeypatch: pytest.MonkeyPatch):
+    logger.info('sort_iter')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    my_sort = Sorter(engine=engine)
+    my_sort.delimiter = ','
+    my_sort.sort_key_option = '-k4,4 -k1,3'
+    my_sort.ignore_case = True
+    my_sort.tempdir = str(tempdir)
+
+    records = test_string.splitlines()
+    result = my_sort.sort_iter(iter(records))
+    assert isinstance(result, Generator)
+    assert list(result) == expected_string.splitlines()
+
+    result = list(my_sort.sort_iter(line.encode() + b'\n' for line in records))
+    assert result == [line.encode() for line in expected_string.splitlines()]
+
+    assert list(my_sort.sort_iter([])) == []
+
+    # text file objects are iterables of lines as well
+    with open(tempdir.joinpath('before.txt'), 'r') as file:
+        assert list(my_sort.sort_iter(file)) == expected_string.splitlines()
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=200)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_sort_file_objects(engine: str, tempdir: Path, logger: Logger):
+    logger.info('sort_file_objects')
+
+    my_sort = Sorter(engine=engine)
+
+    output = io.BytesIO()
+    my_sort.sort(io.BytesIO(test_string.encode()), output, '-k4,4 -k1,3', ',')
+    assert output.getvalue() == expected_string.encode()
+
+    after = tempdir.joinpath(f'after_file_object_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.sort(io.BytesIO(test_string.encode()), str(after), '-k4,4 -k1,3', ',')
+    assert after.read_text() == expected_string
+
+    output = io.BytesIO()
+    my_sort = Sorter(engine=engine)
+    my_sort.merge([str(after), str(after)], output, '-k4,4 -k1,3', ',')
+    assert output.getvalue() == b''.join(line.encode() * 2 for line in expected_string.splitlines(True))
+    # end def
+
+
+@pytest.mark.run(order=210)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+@pytest.mark.parametrize('sort_key,delimiter', [(None, None), ('-k2,2n', ','),
+                                                ('-k1,1f', ',')])
+def test_unique(engine: str, sort_key: str, delimiter: str, tempdir: Path,
+                logger: Logger, monkeypatch: pytest.MonkeyPatch):
+    logger.info('unique')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('duplicated.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(3000, seed=4) * 3)
+        # end with
+
+    after = tempdir.joinpath(f'duplicated_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.unique = True
+    my_sort.buffer_size = '1M'
+    my_sort.sort(str(before), str(after), sort_key, delimiter)
+
+    command = ['sort', '-u'] + (sort_key.split() if sort_key else [])
+    command += [f'-t{delimiter}'] if delimiter else []
+    expected = subprocess.run(command + [str(before)], check=True,
+                              stdout=subprocess.PIPE).stdout
+    assert after.read_bytes() == expected
+    # end def
+
+
+@pytest.mark.run(order=220)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_count_unique(engine: str, tempdir: Path, logger: Logger,
+                      monkeypatch: pytest.MonkeyPatch):
+    logger.info('count_unique')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('counted.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(2000, seed=5) + b'\n' + make_random_lines(1000, seed=5))
+        # end with
+
+    after = tempdir.joinpath(f'counted_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.unique = True
+    my_sort.buffer_size = '1M'
+    my_sort.tempdir = str(tempdir)
+    my_sort.count_unique(str(before), str(after))
+
+    expected = subprocess.run(f'sort \'{before}\' | uniq -c', shell=True, check=True,
+                              stdout=subprocess.PIPE).stdout
+    assert after.read_bytes() == expected
+
+    my_sort = Sorter(engine=engine)
+    assert my_sort.count_unique(io.BytesIO(b'b\na\nb\n')) == '\n      1 a\n      2 b\n'
+    # end def
+
+
+@pytest.mark.run(order=230)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+@pytest.mark.parametrize('k', [0, 1, 100, 5000])
+def test_top_k(engine: str, k: int, tempdir: Path, logger: Logger,
+               monkeypatch: pytest.MonkeyPatch):
+    logger.info('top_k')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('top.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(3000, seed=6))
+        # end with
+
+    after = tempdir.joinpath(f'top_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.top_k(k, str(before), str(after), '-k2,2n -k1', ',')
+    expected = subprocess.run(['sort', '-t,', '-k2,2n', '-k1', str(before)], check=True,
+                              stdout=subprocess.PIPE).stdout
+    assert after.read_bytes() == b''.join(expected.splitlines(True)[:k])
+
+    output = io.BytesIO()
+    my_sort = Sorter(engine=engine)
+    my_sort.top_k(k, str(before), output, largest=True)
+    expected = subprocess.run(['sort', '-r', str(before)], check=True,
+                              stdout=subprocess.PIPE).stdout
+    assert output.getvalue() == b''.join(expected.splitlines(True)[:k])
+
+    with pytest.raises(ValueError):
+        my_sort.top_k(-1, str(before))
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=240)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+@pytest.mark.parametrize('sort_key,delimiter,unique', [(None, None, False),
+                                                       ('-k2,2n', ',', False),
+                                                       ('-k2,2n', ',', True)])
+def test_check(engine: str, sort_key: str, delimiter: str, unique: bool,
+               tempdir: Path, logger: Logger, monkeypatch: pytest.MonkeyPatch):
+    logger.info('check')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('unchecked.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(500, seed=7))
+        # end with
+    checked = tempdir.joinpath(f'checked_{engine}.txt')
+    my_sort = Sorter(engine='gnu')
+    my_sort.unique = unique
+    my_sort.sort(str(before), str(checked), sort_key, delimiter)
+
+    command = ['sort', '-c'] + (['-u'] if unique else [])
+    command += (sort_key.split() if sort_key else []) + ([f'-t{delimiter}'] if delimiter else [])
+    result = subprocess.run(command + [str(before)], stderr=subprocess.PIPE)
+    expected = int(result.stderr.split(b':')[2])
+
+    my_sort = Sorter(engine=engine)
+    my_sort.unique = unique
+    assert my_sort.check(str(before), sort_key, delimiter) == expected
+    assert my_sort.check(str(checked)) is None
+    with open(before, 'rb') as file:
+        assert my_sort.check(file) == expected
+        # end with
+
+    assert my_sort.check_many([str(checked), str(before), str(checked)],
+                              max_workers=2) == [None, expected, None]
+    with pytest.raises(ValueError):
+        my_sort.check([str(before), str(checked)])
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=250)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_sort_compressed(engine: str, tempdir: Path, logger: Logger,
+                         monkeypatch: pytest.MonkeyPatch):
+    logger.info('sort_compressed')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    lines = make_random_lines(20000, seed=8)
+    plain = tempdir.joinpath('compressed_plain.txt')
+    with open(plain, 'wb') as file:
+        file.write(lines)
+        # end with
+    before = tempdir.joinpath('compressed.txt.gz')
+    with gzip.open(before, 'wb') as file:
+        file.write(lines)
+        # end with
+    expected = subprocess.run(['sort', '-t,', '-k2,2', str(plain)], check=True,
+                              stdout=subprocess.PIPE).stdout
+
+    # spilled runs are compressed too
+    after = tempdir.joinpath(f'compressed_{engine}.txt.bz2')
+    my_sort = Sorter(engine=engine)
+    my_sort.buffer_size = '1M'
+    my_sort.tempdir = str(tempdir)
+    my_sort.compress_program = 'gzip'
+    my_sort.output_compression = 'bz2'
+    my_sort.sort(str(before), str(after), '-k2,2', ',')
+    with bz2.open(after, 'rb') as file:
+        assert file.read() == expected
+        # end with
+
+    # compressed and plain inputs mix
+    after = tempdir.joinpath(f'compressed_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.sort([str(before), str(plain)], str(after), '-k2,2', ',')
+    assert after.read_bytes() == b''.join(line * 2 for line in expected.splitlines(True))
+
+    merged = tempdir.joinpath(f'compressed_merged_{engine}.txt')
+    with gzip.open(str(after) + '.gz', 'wb') as file:
+        file.write(after.read_bytes())
+        # end with
+    my_sort.merge([str(after) + '.gz', str(after)], str(merged))
+    assert merged.read_bytes() == b''.join(line * 4 for line in expected.splitlines(True))
+
+    assert Sorter(engine=engine).check(str(before)) == Sorter(engine=engine).check(str(plain))
+    assert my_sort.check(str(after) + '.gz') is None
+
+    with pytest.raises(ValueError):
+        my_sort.output_compression = 'zip'
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=260)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_stats(engine: str, tempdir: Path, logger: Logger,
+               monkeypatch: pytest.MonkeyPatch):
+    logger.info('stats')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    before = tempdir.joinpath('measured.txt')
+    with open(before, 'wb') as file:
+        file.write(make_random_lines(30000, seed=9) + b'\n')
+        # end with
+
+    reported = []
+    after = tempdir.joinpath(f'measured_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.buffer_size = '1M'
+    my_sort.batch_size = 2
+    my_sort.tempdir = str(tempdir)
+    my_sort.stats_hook = reported.append
+    my_sort.sort(str(before), str(after), '-k2,2', ',')
+
+    stats = my_sort.last_stats
+    assert reported == [stats]
+    assert stats.wall_time > 0 and stats.cpu_time > 0 and stats.max_rss > 0
+    assert stats.bytes_read == before.stat().st_size
+    assert stats.bytes_written == after.stat().st_size
+    if engine == 'python':
+        assert stats.runs_spilled > 2 and stats.merge_passes > 1
+    else:
+        assert stats.runs_spilled is None and stats.merge_passes is None
+        # end if
+    assert set(stats.as_dict()) >= {'wall_time', 'cpu_time', 'max_rss'}
+
+    # pickled for checking workers without the hook
+    my_sort.stats_hook = lambda stats: None
+    assert my_sort.check_many([str(after)]) == [None]
+
+    with pytest.raises(ValueError):
+        my_sort.stats_hook = 'log'
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=270)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+def test_auto_settings(engine: str, tempdir: Path, logger: Logger,
+                       monkeypatch: pytest.MonkeyPatch):
+    logger.info('auto_settings')
+
+    monkeypatch.setenv('LC_ALL', 'C')
+
+    after = tempdir.joinpath(f'after_auto_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.buffer_size = 'auto'
+    my_sort.parallel = 'auto'
+    my_sort.sort(str(tempdir.joinpath('before.txt')), str(after), '-k4,4 -k1,3', ',')
+    assert after.read_text() == expected_string
+
+    for value in ('M', '10Mi', 'automatic'):
+        with pytest.raises(ValueError):
+            my_sort.buffer_size = value
+            # end with
+        # end for
+    with pytest.raises(ValueError):
+        my_sort.parallel = 0
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=280)
+@pytest.mark.parametrize('engine', ['gnu', 'python'])
+@pytest.mark.parametrize('sort_key,delimiter', [(None, None), ('-k2,2n -k1', ',')])
+def test_partition_sort(engine: str, sort_key: str, delimiter: str,
+                        tempdir: Path, logger: Logger):
+    logger.info('partition_sort')
+
+    lines = make_random_lines(20000, seed=10)
+    before = tempdir.joinpath('partitioned.txt')
+    with open(before, 'wb') as file:
+        file.write(lines)
+        # end with
+    compressed = tempdir.joinpath('partitioned.txt.gz')
+    with gzip.open(compressed, 'wb') as file:
+        file.write(lines)
+        # end with
+
+    command = ['sort'] + (sort_key.split() if sort_key else [])
+    command += [f'-t{delimiter}'] if delimiter else []
+    expected = subprocess.run(command + [str(before), str(compressed)], check=True,
+                              stdout=subprocess.PIPE, env={'LC_ALL': 'C'}).stdout
+
+    output = tempdir.joinpath(f'partitioned_{engine}.txt')
+    my_sort = Sorter(engine=engine)
+    my_sort.tempdir = str(tempdir)
+    outputs = my_sort.partition_sort([str(before), str(compressed)], 4, str(output),
+                                     sort_key, delimiter, sample_size=500)
+
+    # non overlapping ranges, so the partitions in order are the full sort
+    assert outputs == [f'{output}.{index:05d}' for index in range(4)]
+    results = [Path(path).read_bytes() for path in outputs]
+    assert all(results)
+    assert b''.join(results) == expected
+    assert not list(tempdir.glob('pypart*'))
+    # end def
+
+
+@pytest.mark.run(order=290)
+def test_partition_sort_small(tempdir: Path, logger: Logger):
+    logger.info('partition_sort_small')
+
+    outputs = [str(tempdir.joinpath(f'small_{index}.txt')) for index in range(3)]
+    my_sort = Sorter(engine='python')
+    assert my_sort.partition_sort(str(tempdir.joinpath('before.txt')), outputs,
+                                  sort_key='-k4,4 -k1,3', delimiter=',') == outputs
+    assert ''.join(Path(path).read_text() for path in outputs) == expected_string
+
+    with pytest.raises(ValueError):
+        Sorter().partition_sort(str(tempdir.joinpath('before.txt')), 2)
+        # end with
+    with pytest.raises(ValueError):
+        Sorter().partition_sort(io.BytesIO(b'a\n'), outputs)
+        # end with
+    # end def
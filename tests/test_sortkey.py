@@ -0,0 +1,108 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# author = 'Satoshi Imai'
+# credits = ['Satoshi Imai']
+# version = "1.0.0"
+# ---------------------------------------------------------------------------
+
+import logging
+from logging import Logger, StreamHandler
+from typing import Generator
+
+import pytest
+
+from src.pyshellutil.sortkey import (_compile_extractor,
+                                     _compile_split_extractor, make_sort_key,
+                                     parse_sort_key_option)
+
+
+@pytest.fixture(scope='module')
+def logger() -> Generator[Logger, None, None]:
+    log = logging.getLogger(__name__)
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s : %(message)s')
+    s_handler = StreamHandler()
+    s_handler.setLevel(logging.INFO)
+    s_handler.setFormatter(formatter)
+    log.addHandler(s_handler)
+
+    yield log
+    # end def
+
+
+@pytest.mark.run(order=10)
+def test_parse_sort_key_option(logger: Logger):
+    logger.info('parse_sort_key_option')
+
+    keys = parse_sort_key_option('-k4,4 -k 1.2b,3.4nr --key=2')
+
+    assert len(keys) == 3
+    assert (keys[0].sword, keys[0].schar, keys[0].eword, keys[0].echar) == (3, 0, 3, 0)
+    assert (keys[1].sword, keys[1].schar, keys[1].eword, keys[1].echar) == (0, 1, 2, 4)
+    assert keys[1].skipsblanks is True
+    assert keys[1].skipeblanks is False
+    assert keys[1].numeric is True
+    assert keys[1].reverse is True
+    assert (keys[2].sword, keys[2].eword) == (1, None)
+
+    assert parse_sort_key_option(None) == []
+    # end def
+
+
+@pytest.mark.run(order=20)
+@pytest.mark.parametrize('option', ['-k0', '-k1.0', '-k1,0', '-kx', '-k1M', '-r', '-k',
+                                    '-k2in', '-k2d,2n'])
+def test_parse_sort_key_option_invalid(option: str, logger: Logger):
+    logger.info('parse_sort_key_option_invalid')
+
+    with pytest.raises(ValueError):
+        parse_sort_key_option(option)
+        # end with
+    # end def
+
+
+@pytest.mark.run(order=30)
+def test_make_sort_key(logger: Logger):
+    logger.info('make_sort_key')
+
+    assert make_sort_key() is None
+
+    key = make_sort_key('-k2,2n', ',')
+    lines = [b'a,10', b'b,9', b'c,-1', b'd,x']
+    assert sorted(lines, key=key) == [b'c,-1', b'd,x', b'b,9', b'a,10']
+
+    key = make_sort_key('-k2', None, ignore_case=True)
+    lines = [b'x b', b'y A', b'z  a']
+    # the leading blank belongs to the field without -b
+    assert sorted(lines, key=key) == [b'z  a', b'y A', b'x b']
+
+    key = make_sort_key('-k1,1r', ',', last_resort=False)
+    assert sorted([b'a,2', b'b,1', b'a,1'], key=key) == [b'b,1', b'a,2', b'a,1']
+    # end def
+
+
+@pytest.mark.run(order=40)
+def test_make_sort_key_cached(logger: Logger):
+    logger.info('make_sort_key_cached')
+
+    key = make_sort_key('-k4,4 -k1,3', ',', True, True, True)
+    assert make_sort_key('-k4,4 -k1,3', ',', True, True, True) is key
+    assert make_sort_key('-k4,4 -k1,3', ';', True, True, True) is not key
+    # end def
+
+
+@pytest.mark.run(order=50)
+@pytest.mark.parametrize('option', ['-k2,2', '-k2', '-k1,3', '-k3,2', '-k2b,3f',
+                                    '-k2b,2', '-k9,9', '-k2bn'])
+def test_split_extractor_matches_generic(option: str, logger: Logger):
+    logger.info('split_extractor_matches_generic')
+
+    lines = [b'a, 2,b,x', b'A,10, c', b'b,-1.5,', b'', b' c', b'b,2,B,y,z', b',,,', b'a,  ,b']
+    key = parse_sort_key_option(option)[0]
+    split_extractor = _compile_split_extractor(key, b',')
+    generic_extractor = _compile_extractor(key, b',')
+
+    for line in lines:
+        assert split_extractor(line.split(b',')) == generic_extractor(line)
+        # end for
+    # end def
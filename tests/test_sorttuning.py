@@ -0,0 +1,71 @@
+# coding:utf-8
+# ---------------------------------------------------------------------------
+# author = 'Satoshi Imai'
+# credits = ['Satoshi Imai']
+# version = "1.0.0"
+# ---------------------------------------------------------------------------
+
+import logging
+from logging import Logger, StreamHandler
+from typing import Generator
+
+import pytest
+
+from src.pyshellutil.sorttuning import (DEFAULT_FAN_IN, MAX_PARALLEL,
+                                        MEBIBYTE, MIN_BUFFER_SIZE,
+                                        available_cpus, available_memory,
+                                        free_space, tune_batch_size,
+                                        tune_buffer_size, tune_parallel)
+
+
+@pytest.fixture(scope='module')
+def logger() -> Generator[Logger, None, None]:
+    log = logging.getLogger(__name__)
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s : %(message)s')
+    s_handler = StreamHandler()
+    s_handler.setLevel(logging.INFO)
+    s_handler.setFormatter(formatter)
+    log.addHandler(s_handler)
+
+    yield log
+    # end def
+
+
+@pytest.mark.run(order=10)
+def test_host_resources(logger: Logger):
+    logger.info('host_resources')
+
+    assert available_memory() > 0
+    assert available_cpus() >= 1
+    assert free_space() > 0
+    # end def
+
+
+@pytest.mark.run(order=20)
+def test_tune_buffer_size(logger: Logger):
+    logger.info('tune_buffer_size')
+
+    memory = 1024 * MEBIBYTE
+    # small input is sorted in memory with a modest buffer
+    assert tune_buffer_size(1000, memory) == MIN_BUFFER_SIZE
+    assert tune_buffer_size(100 * MEBIBYTE, memory) == 200 * MEBIBYTE
+    # large or unknown input gets half of the memory
+    assert tune_buffer_size(50 * 1024 * MEBIBYTE, memory) == 512 * MEBIBYTE
+    assert tune_buffer_size(None, memory) == 512 * MEBIBYTE
+    assert tune_buffer_size(None, 0) == MEBIBYTE
+    # end def
+
+
+@pytest.mark.run(order=30)
+def test_tune_parallel_and_batch_size(logger: Logger):
+    logger.info('tune_parallel_and_batch_size')
+
+    assert tune_parallel(1000, 4) == 1
+    assert tune_parallel(1024 * MEBIBYTE, 4) == 4
+    assert tune_parallel(None, 64) == MAX_PARALLEL
+
+    assert tune_batch_size(100 * MEBIBYTE, 512 * MEBIBYTE) is None
+    # 200 runs are merged in a single pass
+    assert tune_batch_size(50 * 1024 * MEBIBYTE, 512 * MEBIBYTE) > DEFAULT_FAN_IN
+    # end def